@@ -0,0 +1,131 @@
+import argparse
+import itertools
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from scene import apply_scene, load_scene
+from simulation import MATERIALS, SimulationWorld
+
+# Колонки файла результатов и их типы
+COLUMNS = (
+    ("frequency", np.float32),
+    ("wave_speed", np.float32),
+    ("material", "U8"),
+    ("sonar_detections", np.int32),
+    ("sonar_min_range", np.float32),
+    ("sonar_max_range", np.float32),
+    ("radar_detections", np.int32),
+    ("radar_min_range", np.float32),
+    ("radar_max_range", np.float32),
+    ("secondary_emitted", np.int32),
+    ("secondary_merged", np.int32),
+    ("secondary_dropped", np.int32),
+    ("secondary_peak", np.int32),
+    ("secondary_energy", np.float32),
+    ("run_seconds", np.float32),
+)
+
+# Значение материала "как в сцене" - препятствия сохраняют свои материалы
+SCENE_MATERIAL = "SCENE"
+
+
+def build_world(scene, frequency, wave_speed, material=SCENE_MATERIAL):
+    world = apply_scene(SimulationWorld(), scene, None if material == SCENE_MATERIAL else material)
+    world.frequency = frequency
+    world.wave_speed = wave_speed
+    return world
+
+
+def _ranges(distances):
+    if not distances:
+        return np.nan, np.nan
+    return min(distances), max(distances)
+
+
+def run_case(scene, frequency, wave_speed, material, steps, pulse_interval):
+    # Один прогон без окна: импульс радио, сонара и радар с первого тика, затем n шагов
+    started = time.perf_counter()
+    world = build_world(scene, frequency, wave_speed, material)
+    pulses = []
+    radar_seen = {}
+    peak = 0
+    for tick in range(steps):
+        if tick == 0 or (pulse_interval and tick % pulse_interval == 0):
+            world.pulse("RADIO")
+            world.pulse("SONAR")
+            pulses.append(world.sonar_pulses[-1])
+            world.pulse("RADAR")
+        world.step()
+        # Радар очищает обнаружения на каждом обороте - собираем их по ходу
+        for radar in world.radar_sweeps:
+            for detection in radar.detections:
+                radar_seen[id(detection['obstacle'])] = detection['distance']
+        peak = max(peak, world.emitter.live_secondaries())
+
+    sonar_ranges = [d['distance'] for pulse in pulses for d in pulse.detections]
+    emitter = world.emitter
+    return (frequency, wave_speed, material,
+            len(sonar_ranges), *_ranges(sonar_ranges),
+            len(radar_seen), *_ranges(list(radar_seen.values())),
+            emitter.emitted, emitter.merged, emitter.dropped, peak, emitter.emitted_energy,
+            time.perf_counter() - started)
+
+
+def _run_case(args):
+    return run_case(*args)
+
+
+def sweep(scene, frequencies, speeds, materials, steps=600, pulse_interval=0, workers=None):
+    # Декартово произведение параметров по пулу процессов; строки в порядке сетки
+    cases = [(scene, frequency, speed, material, steps, pulse_interval)
+             for frequency, speed, material in itertools.product(frequencies, speeds, materials)]
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        return [run_case(*case) for case in cases]
+    chunksize = max(1, len(cases) // (workers * 4))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(_run_case, cases, chunksize=chunksize))
+
+
+def save_results(path, rows):
+    # Колоночный формат: по массиву numpy на колонку в одном сжатом .npz
+    columns = {}
+    for i, (name, dtype) in enumerate(COLUMNS):
+        columns[name] = np.array([row[i] for row in rows], dtype=dtype)
+    np.savez_compressed(path, **columns)
+
+
+def load_results(path):
+    with np.load(path) as data:
+        return {name: data[name] for name, _ in COLUMNS}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Пакетный прогон симуляции по сетке параметров")
+    parser.add_argument("scene", help="файл сцены (.json или .npz)")
+    parser.add_argument("--frequency", type=float, nargs="+", default=[1.0], help="частоты (0.1 - 5.0)")
+    parser.add_argument("--speed", type=float, nargs="+", default=[2.0], help="скорости волн (1 - 10)")
+    parser.add_argument("--material", nargs="+", default=[SCENE_MATERIAL],
+                        help=f"материалы всех препятствий: {', '.join(MATERIALS)} или {SCENE_MATERIAL}")
+    parser.add_argument("--steps", type=int, default=600, help="шагов симуляции на прогон")
+    parser.add_argument("--pulse-interval", type=int, default=0, help="повтор импульсов каждые N тиков (0 - один раз)")
+    parser.add_argument("--workers", type=int, default=None, help="число процессов (по умолчанию - все ядра)")
+    parser.add_argument("--out", default="results.npz", help="файл результатов")
+    args = parser.parse_args()
+
+    for material in args.material:
+        if material != SCENE_MATERIAL and material not in MATERIALS:
+            parser.error(f"Неизвестный материал: {material}")
+
+    scene = load_scene(args.scene)
+    started = time.perf_counter()
+    rows = sweep(scene, args.frequency, args.speed, args.material, args.steps, args.pulse_interval, args.workers)
+    save_results(args.out, rows)
+    print(f"{len(rows)} прогонов за {time.perf_counter() - started:.1f} с -> {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,283 @@
+import os
+
+# Без окна: рендеринг идёт во внеэкранный буфер SDL
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import argparse  # noqa: E402
+import importlib.util  # noqa: E402
+import json  # noqa: E402
+import random  # noqa: E402
+import time  # noqa: E402
+import tracemalloc  # noqa: E402
+from collections import namedtuple  # noqa: E402
+
+import numpy as np  # noqa: E402
+
+from simulation import (MATERIALS, SIM_DT, SIM_HEIGHT, SIM_WIDTH, TICK_RATE, RadarSweep,  # noqa: E402
+                        SimulationWorld, SonarPulse)
+
+APP_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "Radio-wave-simulation.py")
+
+# Масштаб сцены: число препятствий, вершин у каждого, одновременных радиоволн и шагов авто режима
+Scale = namedtuple("Scale", "obstacles vertices waves steps")
+
+SCALES = {
+    "small": Scale(obstacles=10, vertices=4, waves=5, steps=300),
+    "medium": Scale(obstacles=100, vertices=8, waves=50, steps=600),
+    "large": Scale(obstacles=400, vertices=16, waves=200, steps=1200),
+}
+
+# Замедление относительно базовой линии, начиная с которого считаем регрессию
+DEFAULT_TOLERANCE = 0.2
+
+
+def load_app():
+    # Окно приложения (панель, кнопки, draw_ui) без запуска основного цикла
+    spec = importlib.util.spec_from_file_location("radio_wave_app", APP_PATH)
+    app = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(app)
+    return app
+
+
+def build_world(scale, seed=0):
+    # Сцена по масштабу: случайные выпуклые многоугольники с фиксированным зерном
+    rng = random.Random(seed)
+    world = SimulationWorld(wave_source=(SIM_WIDTH // 4, SIM_HEIGHT // 2),
+                            sonar_source=(SIM_WIDTH // 4, SIM_HEIGHT // 4),
+                            radar_source=(SIM_WIDTH // 4, 3 * SIM_HEIGHT // 4))
+    materials = list(MATERIALS)
+    for _ in range(scale.obstacles):
+        cx = rng.uniform(40, SIM_WIDTH - 40)
+        cy = rng.uniform(40, SIM_HEIGHT - 40)
+        size = rng.uniform(8, 30)
+        points = [(cx + size * np.cos(2 * np.pi * i / scale.vertices),
+                   cy + size * np.sin(2 * np.pi * i / scale.vertices)) for i in range(scale.vertices)]
+        world.add_obstacle([(float(x), float(y)) for x, y in points], rng.choice(materials))
+    return world
+
+
+def populate(world, scale):
+    # Одновременно летящие радиоволны, сонар и радар
+    interval = max(1, int(600 / world.wave_speed / max(scale.waves, 1)))
+    for tick in range(scale.waves * interval):
+        if tick % interval == 0:
+            world.pulse("RADIO")
+        world.step()
+    world.pulse("SONAR")
+    world.pulse("RADAR")
+    world.pulse("RAYS")
+    world.run(30)
+    return world
+
+
+def summarize(samples):
+    # samples - длительности в наносекундах
+    ms = np.array(samples, dtype=np.float64) / 1e6
+    total = ms.sum()
+    return {
+        "calls": len(ms),
+        "mean_ms": float(ms.mean()) if len(ms) else 0.0,
+        "p50_ms": float(np.percentile(ms, 50)) if len(ms) else 0.0,
+        "p95_ms": float(np.percentile(ms, 95)) if len(ms) else 0.0,
+        "p99_ms": float(np.percentile(ms, 99)) if len(ms) else 0.0,
+        "per_sec": float(len(ms) / (total / 1000)) if total > 0 else 0.0,
+    }
+
+
+def timed(samples, fn, *args):
+    start = time.perf_counter_ns()
+    result = fn(*args)
+    samples.append(time.perf_counter_ns() - start)
+    return result
+
+
+def bench_contacts(scale):
+    # Касания радиоволн по расписанию в авто режиме: постановка волны в расписание (add_wave)
+    # и обработка наступивших за шаг касаний (pop_due и handle_wave_contact)
+    world = build_world(scale)
+    world.auto_interval = max(1, 600 // max(scale.waves, 1)) / TICK_RATE
+    world.toggle_auto()
+    scheduler = world.scheduler
+    add_wave = scheduler.add_wave
+    pop_due = scheduler.pop_due
+    schedule_samples = []
+    contact_samples = []
+
+    def pop_and_handle(now):
+        # Касания обрабатываются здесь же, шагу мира остаётся пустой список
+        start = time.perf_counter_ns()
+        for event in pop_due(now):
+            world.handle_wave_contact(event)
+        contact_samples.append(time.perf_counter_ns() - start)
+        return []
+
+    scheduler.add_wave = lambda *args: timed(schedule_samples, add_wave, *args)
+    scheduler.pop_due = pop_and_handle
+    world.run(scale.steps)
+    return summarize(schedule_samples), summarize(contact_samples)
+
+
+def bench_sonar(world):
+    samples = []
+    pulse = SonarPulse(world.sonar_source, world.frequency * 0.5, world.wave_speed * 0.8)
+    while pulse.active:
+        table = world.sonar_tables.get(pulse.origin, world.obstacles_version)
+        timed(samples, pulse.update, world.obstacles, table, SIM_DT)
+    return summarize(samples)
+
+
+def bench_radar(world):
+    samples = []
+    radar = RadarSweep(world.radar_source, 250, 3)
+    for _ in range(360):
+        timed(samples, radar.update, world.obstacles, world.centroids, world.obstacles_version, SIM_DT)
+    return summarize(samples)
+
+
+def bench_raytrace(world):
+    # Полная трассировка лучей импульса RAYS со всеми переотражениями
+    samples = []
+    for _ in range(20):
+        timed(samples, world.ray_tracer.trace, world.wave_source)
+    return summarize(samples)
+
+
+def bench_steps(scale):
+    # Авто режим без отрисовки: шагов в секунду и пиковая память
+    world = build_world(scale)
+    world.auto_interval = max(1, 600 // max(scale.waves, 1)) / TICK_RATE
+    world.toggle_auto()
+    samples = []
+    for _ in range(scale.steps):
+        timed(samples, world.step)
+
+    tracemalloc.start()
+    world = build_world(scale)
+    world.auto_interval = max(1, 600 // max(scale.waves, 1)) / TICK_RATE
+    world.toggle_auto()
+    world.run(scale.steps)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    result = summarize(samples)
+    result["peak_mb"] = peak / (1024 * 1024)
+    return result
+
+
+def bench_render(world, app, frames=60):
+    # Отдельно каждый метод отрисовки, панель и кадр целиком
+    screen = app.screen
+    renderer = app.renderer
+    draws = {
+        "draw_radio_wave": lambda s: [renderer.draw_radio_wave(screen, w) for w in s.waves],
+        "draw_sonar_pulse": lambda s: [renderer.draw_sonar_pulse(screen, p) for p in s.sonar_pulses],
+        "draw_radar_sweep": lambda s: [renderer.draw_radar_sweep(screen, r, s.time) for r in s.radar_sweeps],
+        "draw_reflected_wave": lambda s: [renderer.draw_reflected_wave(screen, w) for w in s.reflected_waves],
+        "draw_transmitted_wave": lambda s: [renderer.draw_transmitted_wave(screen, w) for w in s.transmitted_waves],
+        "draw_beam": lambda s: [renderer.draw_beam(screen, b) for b in s.beams],
+        "draw_scene": lambda s: renderer.draw_scene(screen, s),
+        "draw_ui": lambda s: app.draw_ui(screen, s),
+    }
+    samples = {name: [] for name in draws}
+    frame_samples = []
+    for _ in range(frames):
+        start = time.perf_counter_ns()
+        world.step()
+        snapshot = world.snapshot()
+        screen.fill((0, 0, 0))
+        for name, draw in draws.items():
+            timed(samples[name], draw, snapshot)
+        renderer.draw_sources(screen, snapshot)
+        renderer.draw_sonar_detections(screen, snapshot)
+        app.pygame.display.flip()
+        frame_samples.append(time.perf_counter_ns() - start)
+
+    results = {name: summarize(values) for name, values in samples.items()}
+    results["frame"] = summarize(frame_samples)
+    return results
+
+
+def run_benchmarks(scales, app):
+    results = {}
+    for name in scales:
+        scale = SCALES[name]
+        world = populate(build_world(scale), scale)
+        results[f"{name}/schedule_wave"], results[f"{name}/wave_contacts"] = bench_contacts(scale)
+        results[f"{name}/sonar_update"] = bench_sonar(world)
+        results[f"{name}/radar_update"] = bench_radar(world)
+        results[f"{name}/ray_trace"] = bench_raytrace(world)
+        results[f"{name}/world_step"] = bench_steps(scale)
+        for bench, result in bench_render(world, app).items():
+            results[f"{name}/{bench}"] = result
+    return results
+
+
+def best_of(runs):
+    # Из нескольких повторов берём лучшую медиану: шум машины только замедляет
+    best = {}
+    for results in runs:
+        for key, result in results.items():
+            if key not in best or result["p50_ms"] < best[key]["p50_ms"]:
+                best[key] = result
+    return best
+
+
+def compare(results, baseline, tolerance=DEFAULT_TOLERANCE):
+    # Отношение медиан к базовой линии; регрессия - медленнее больше чем на tolerance
+    regressions = []
+    for key, result in results.items():
+        base = baseline.get(key)
+        if not base or base["p50_ms"] <= 0:
+            result["ratio"] = None
+            continue
+        result["ratio"] = result["p50_ms"] / base["p50_ms"]
+        if result["ratio"] > 1 + tolerance:
+            regressions.append(key)
+    return regressions
+
+
+def report(results):
+    print(f"{'бенчмарк':<40} {'вызовов':>8} {'p50 мс':>9} {'p95 мс':>9} {'p99 мс':>9} {'в сек':>10} {'к базе':>8}")
+    for key, result in results.items():
+        ratio = result.get("ratio")
+        ratio_text = f"{ratio:.2f}x" if ratio else "-"
+        print(f"{key:<40} {result['calls']:>8} {result['p50_ms']:>9.3f} {result['p95_ms']:>9.3f} "
+              f"{result['p99_ms']:>9.3f} {result['per_sec']:>10.0f} {ratio_text:>8}")
+        if "peak_mb" in result:
+            print(f"{'':<40} пик памяти {result['peak_mb']:.1f} МБ")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Бенчмарки шага симуляции и отрисовки без окна")
+    parser.add_argument("--scale", nargs="+", choices=list(SCALES), default=list(SCALES), help="масштабы сцен")
+    parser.add_argument("--baseline", default="benchmark_baseline.json", help="файл базовой линии для сравнения")
+    parser.add_argument("--save-baseline", action="store_true", help="записать результаты как новую базовую линию")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE, help="допустимое замедление (0.2 = 20%%)")
+    parser.add_argument("--repeat", type=int, default=3, help="повторов, берётся лучший")
+    parser.add_argument("--out", help="записать результаты в JSON")
+    args = parser.parse_args()
+
+    app = load_app()
+    results = best_of(run_benchmarks(args.scale, app) for _ in range(max(1, args.repeat)))
+
+    regressions = []
+    if not args.save_baseline and os.path.exists(args.baseline):
+        with open(args.baseline, encoding="utf-8") as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+    report(results)
+
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2, ensure_ascii=False)
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2, ensure_ascii=False)
+        print(f"Базовая линия записана в {args.baseline}")
+    if regressions:
+        print("Регрессии:", ", ".join(regressions))
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+from simulation import SIM_DT
+
+# Больше шагов за кадр не делаем: остаток времени отбрасывается, иначе медленный
+# кадр тянет за собой ещё больше шагов и приложение не выходит из отставания
+MAX_STEPS_PER_FRAME = 8
+
+# Кадр длиннее этого (перетаскивание окна, отладчик) считается паузой
+MAX_FRAME_SECONDS = 0.25
+
+# Допустимые множители скорости времени
+TIME_SCALES = (0.125, 0.25, 0.5, 1.0, 2.0, 4.0)
+
+
+class SimulationClock:
+    # Часы симуляции с фиксированным шагом физики.
+    # Реальное время кадра (с учётом множителя) копится в accumulator и расходуется
+    # целыми шагами step, поэтому мир движется одинаково при любой частоте кадров,
+    # а при нехватке времени теряются кадры отрисовки, а не шаги физики
+    def __init__(self, step=SIM_DT, max_steps=MAX_STEPS_PER_FRAME):
+        self.step = step
+        self.max_steps = max_steps
+        self.accumulator = 0.0
+        self.time_scale = 1.0
+        self.paused = False
+        self.pending_steps = 0  # одиночные шаги на паузе
+        self.dropped = 0.0  # отброшенное время симуляции, с
+
+    def advance(self, frame_seconds):
+        # Сколько фиксированных шагов сделать в этом кадре
+        if self.paused:
+            steps, self.pending_steps = self.pending_steps, 0
+            return steps
+
+        self.accumulator += min(frame_seconds, MAX_FRAME_SECONDS) * self.time_scale
+        # Половина шага - запас на погрешность суммирования кадров по 1/60 с
+        steps = int((self.accumulator + self.step / 2) // self.step)
+        if steps > self.max_steps:
+            self.dropped += (steps - self.max_steps) * self.step
+            steps = self.max_steps
+            self.accumulator = 0.0
+        else:
+            self.accumulator -= steps * self.step
+        return steps
+
+    def toggle_pause(self):
+        self.paused = not self.paused
+        self.accumulator = 0.0
+        return self.paused
+
+    def step_once(self):
+        # Один шаг на паузе
+        if self.paused:
+            self.pending_steps += 1
+
+    def faster(self):
+        self.time_scale = _next_scale(self.time_scale, 1)
+
+    def slower(self):
+        self.time_scale = _next_scale(self.time_scale, -1)
+
+
+def _next_scale(scale, direction):
+    index = min(range(len(TIME_SCALES)), key=lambda i: abs(TIME_SCALES[i] - scale))
+    return TIME_SCALES[max(0, min(len(TIME_SCALES) - 1, index + direction))]
@@ -0,0 +1,130 @@
+import math
+
+import numpy as np
+
+# Ограничение на число пар (луч, препятствие) за один векторный проход, чтобы не раздувать память
+MAX_PAIRS_PER_CHUNK = 2_000_000
+
+
+def point_in_polygon(point, polygon):
+    x, y = point
+    n = len(polygon)
+    inside = False
+
+    p1x, p1y = polygon[0]
+    for i in range(1, n + 1):
+        p2x, p2y = polygon[i % n]
+        if y > min(p1y, p2y):
+            if y <= max(p1y, p2y):
+                if x <= max(p1x, p2x):
+                    if p1y != p2y:
+                        xinters = (y - p1y) * (p2x - p1x) / (p2y - p1y) + p1x
+                    if p1x == p2x or x <= xinters:
+                        inside = not inside
+        p1x, p1y = p2x, p2y
+
+    return inside
+
+
+def edge_faces(obstacle, edge, point):
+    # True, если ребро смотрит наружной стороной на point (лицевое для волны из point).
+    # Наружная сторона определяется по обходу многоугольника (знак площади)
+    points = obstacle.points
+    n = len(points)
+    area = sum(points[i][0] * points[(i + 1) % n][1] - points[(i + 1) % n][0] * points[i][1] for i in range(n))
+    p1 = points[edge]
+    p2 = points[(edge + 1) % n]
+    side = (p2[0] - p1[0]) * (point[1] - p1[1]) - (p2[1] - p1[1]) * (point[0] - p1[0])
+    # При обходе против часовой стрелки (area > 0) внутренность слева от ребра
+    return side * area <= 0
+
+
+def angular_fraction(origin, points):
+    # Доля окружности с центром origin, которую заслоняет многоугольник (1 - если origin внутри)
+    if point_in_polygon(origin, points):
+        return 1.0
+    cx = sum(p[0] for p in points) / len(points) - origin[0]
+    cy = sum(p[1] for p in points) / len(points) - origin[1]
+    angles = [math.atan2(cx * (p[1] - origin[1]) - cy * (p[0] - origin[0]),
+                         cx * (p[0] - origin[0]) + cy * (p[1] - origin[1])) for p in points]
+    return min(1.0, (max(angles) - min(angles)) / (2 * math.pi))
+
+
+class CollisionEngine:
+    # Рёбра всех многоугольников в плоских массивах, сгруппированных по препятствиям:
+    # по ним одним векторным проходом строятся таблицы дальностей и трассируются лучи.
+    def __init__(self, obstacles=()):
+        self.rebuild(obstacles)
+
+    def rebuild(self, obstacles):
+        self.obstacles = []
+        self._edges = []
+        self._starts = []
+        self._counts = []
+        self._bounds = []
+        self._packed = False
+        for obstacle in obstacles:
+            self.add(obstacle)
+
+    def add(self, obstacle):
+        # Новое препятствие дописывается в конец, массивы пересобираются лениво при следующей проверке
+        points = obstacle.points
+        n = len(points)
+        self.obstacles.append(obstacle)
+        self._starts.append(len(self._edges))
+        self._counts.append(n)
+        for i in range(n):
+            p1 = points[i]
+            p2 = points[(i + 1) % n]
+            self._edges.append((p1[0], p1[1], p2[0], p2[1]))
+        xs = [p[0] for p in points]
+        ys = [p[1] for p in points]
+        self._bounds.append((min(xs), min(ys), max(xs), max(ys)) if points else (0, 0, 0, 0))
+        self._packed = False
+
+    def pack(self):
+        if self._packed:
+            return
+        edges = np.array(self._edges, dtype=np.float64).reshape(-1, 4)
+        self.edge_x1, self.edge_y1, self.edge_x2, self.edge_y2 = edges.T
+        self.edge_starts = np.array(self._starts, dtype=np.intp)
+        self.edge_counts = np.array(self._counts, dtype=np.intp)
+        self.bounds = np.array(self._bounds, dtype=np.float64).reshape(-1, 4)
+        self.edge_obstacle = np.repeat(np.arange(len(self._counts)), self.edge_counts)
+        self.edge_local = np.arange(len(self._edges)) - np.repeat(self.edge_starts, self.edge_counts)
+        self._packed = True
+
+    def edge_distances(self, origin, first_obstacle=0):
+        # Ближнее и дальнее расстояние от точки до каждого ребра препятствий, начиная с first_obstacle,
+        # и ближайшая точка ребра. Возвращает (obstacle_id, edge, distance, far, x, y) массивами
+        self.pack()
+        if first_obstacle >= len(self.obstacles):
+            empty = np.zeros(0)
+            return empty.astype(np.intp), empty.astype(np.intp), empty, empty, empty, empty
+        start = self.edge_starts[first_obstacle]
+        x1 = self.edge_x1[start:]
+        y1 = self.edge_y1[start:]
+        dx = self.edge_x2[start:] - x1
+        dy = self.edge_y2[start:] - y1
+        length_sq = dx * dx + dy * dy
+        safe_length_sq = np.where(length_sq == 0, 1.0, length_sq)
+        t = np.clip(((origin[0] - x1) * dx + (origin[1] - y1) * dy) / safe_length_sq, 0.0, 1.0)
+        foot_x = x1 + t * dx
+        foot_y = y1 + t * dy
+        distance = np.hypot(foot_x - origin[0], foot_y - origin[1])
+        far = np.maximum(np.hypot(x1 - origin[0], y1 - origin[1]),
+                         np.hypot(self.edge_x2[start:] - origin[0], self.edge_y2[start:] - origin[1]))
+        keep = length_sq > 0
+        return (self.edge_obstacle[start:][keep], self.edge_local[start:][keep], distance[keep], far[keep],
+                foot_x[keep], foot_y[keep])
+
+    def vertex_distances(self, origin, first_obstacle=0):
+        # Расстояние от точки до каждой вершины препятствий, начиная с first_obstacle.
+        # Вершина i препятствия - начало его ребра i. Возвращает (obstacle_id, point_index, distance)
+        self.pack()
+        if first_obstacle >= len(self.obstacles):
+            empty = np.zeros(0)
+            return empty.astype(np.intp), empty.astype(np.intp), empty
+        start = self.edge_starts[first_obstacle]
+        distance = np.hypot(self.edge_x1[start:] - origin[0], self.edge_y1[start:] - origin[1])
+        return self.edge_obstacle[start:], self.edge_local[start:], distance
@@ -0,0 +1,90 @@
+import math
+from collections import OrderedDict
+
+import numpy as np
+
+# Кольца больше этого радиуса не попадают в спрайт, а рисуются дугами по видимой части:
+# такой спрайт почти весь лежит за областью симуляции и занимает много памяти кэша
+ARC_RADIUS = 400
+
+# Шаг точек ломаной дуги вдоль кольца, пикселей (отклонение от окружности меньше 0.1 px)
+ARC_STEP = 8
+
+
+def rect_distances(point, rect):
+    # Расстояния от точки до ближайшей точки прямоугольника (0 - внутри) и до дальнего угла
+    x, y = point
+    left, top, right, bottom = rect
+    near_x = left - x if x < left else (x - right if x > right else 0)
+    near_y = top - y if y < top else (y - bottom if y > bottom else 0)
+    far_x = x - left if x + x > left + right else right - x
+    far_y = y - top if y + y > top + bottom else bottom - y
+    return math.hypot(near_x, near_y), math.hypot(far_x, far_y)
+
+
+def visible_rings(origin, ring_spacing, ring_count, rect, margin=0):
+    # Номера колец first..last (с единицы), пересекающих rect; first > last - не видно ни одного.
+    # Кольцо радиуса r задевает прямоугольник, только если near <= r <= far;
+    # margin - запас на толщину линии. rect - (left, top, right, bottom)
+    near, far = rect_distances(origin, rect)
+    first = 1 if near <= margin + ring_spacing else math.ceil((near - margin) / ring_spacing)
+    last = min(ring_count, int((far + margin) / ring_spacing))
+    return first, last
+
+
+def visible_arcs(origin, radius, rect, margin=0):
+    # Ломаные (массивы точек (n, 2)) по частям кольца внутри rect (left, top, right, bottom),
+    # расширенного на margin.
+    # Каждая дуга продлена на точку за край, чтобы доходить до границы области
+    count = max(16, int(2 * math.pi * radius / ARC_STEP))
+    angles = np.linspace(0.0, 2 * math.pi, count + 1)
+    xs = origin[0] + radius * np.cos(angles)
+    ys = origin[1] + radius * np.sin(angles)
+    left, top, right, bottom = rect
+    inside = ((xs >= left - margin) & (xs <= right + margin) &
+              (ys >= top - margin) & (ys <= bottom + margin))
+    points = np.column_stack((xs, ys))
+    if inside.all():
+        return [points]
+
+    change = np.diff(np.concatenate(([0], inside.view(np.int8), [0])))
+    starts = np.flatnonzero(change == 1)
+    stops = np.flatnonzero(change == -1)
+    arcs = []
+    for start, stop in zip(starts.tolist(), stops.tolist()):
+        arc = points[max(0, start - 1):min(len(points), stop + 1)]
+        if len(arc) > 1:
+            arcs.append(arc)
+    return arcs
+
+
+class ArcCache:
+    # Видимые дуги колец по (центр, радиус, область, запас) - списки точек, готовые для draw.lines.
+    # Волны одного источника с одним шагом колец проходят одни и те же радиусы,
+    # поэтому дуга считается один раз на все такие волны
+    def __init__(self, max_entries=256):
+        self.max_entries = max_entries
+        self.arcs = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.arcs)
+
+    def get(self, origin, radius, rect, margin=0):
+        key = (origin[0], origin[1], radius, rect, margin)
+        arcs = self.arcs.get(key)
+        if arcs is not None:
+            self.arcs.move_to_end(key)
+            self.hits += 1
+            return arcs
+
+        self.misses += 1
+        arcs = [arc.tolist() for arc in visible_arcs(origin, radius, rect, margin)]
+        self.arcs[key] = arcs
+        if len(self.arcs) > self.max_entries:
+            self.arcs.popitem(last=False)
+        return arcs
+
+    def clear(self):
+        self.arcs.clear()
@@ -0,0 +1,117 @@
+import math
+from bisect import bisect_left, bisect_right
+
+import numpy as np
+
+
+class SonarRangeTable:
+    # Вершины всех препятствий, отсортированные по дальности от источника сонара.
+    # Препятствия и источник неподвижны, поэтому таблица строится один раз
+    # и пересобирается только при изменении набора препятствий.
+    def __init__(self, origin, engine, version):
+        self.origin = origin
+        self.version = version
+        obstacle_ids, point_ids, distance = engine.vertex_distances(origin)
+        # Вершина i препятствия - начало его ребра i, координаты берём из упакованных рёбер
+        xs = engine.edge_x1[:len(distance)]
+        ys = engine.edge_y1[:len(distance)]
+        order = np.argsort(distance, kind="stable")
+        self.distance = distance[order]
+        self.bearing = np.arctan2(ys - origin[1], xs - origin[0])[order]
+        self.obstacle_id = obstacle_ids[order]
+        self.point_id = point_ids[order]
+        # Список для bisect: поиск окна по дальности без numpy-накладных на маленьких запросах
+        self.distance_list = self.distance.tolist()
+
+    def __len__(self):
+        return len(self.distance_list)
+
+    def window(self, r_inner, r_outer):
+        # Строки таблицы с дальностью строго между r_inner и r_outer
+        return bisect_right(self.distance_list, r_inner), bisect_left(self.distance_list, r_outer)
+
+
+class EdgeRangeTable:
+    # Рёбра препятствий (начиная с first_obstacle), отсортированные по ближнему расстоянию
+    # от источника радиоволн, с ближайшей точкой ребра и дальним расстоянием.
+    # Фронт из источника доходит до рёбер в порядке строк таблицы, поэтому расписанию касаний
+    # волны хватает номера следующей строки, а дальность волны - это бинарный поиск
+    def __init__(self, origin, engine, version, first_obstacle=0):
+        self.origin = origin
+        self.version = version
+        obstacle_ids, edges, distance, far, foot_x, foot_y = engine.edge_distances(origin, first_obstacle)
+        order = np.argsort(distance, kind="stable")
+        # Списки: расписание читает по одной строке, без numpy-накладных на каждое касание
+        self.distance = distance[order].tolist()
+        self.far = far[order].tolist()
+        self.obstacle_id = obstacle_ids[order].tolist()
+        self.edge = edges[order].tolist()
+        self.x = foot_x[order].tolist()
+        self.y = foot_y[order].tolist()
+
+    def __len__(self):
+        return len(self.distance)
+
+    def reach_rows(self, max_radius):
+        # Число первых строк, до которых фронт доходит в пределах max_radius
+        return bisect_right(self.distance, max_radius)
+
+
+class RangeTables:
+    # Таблицы дальностей (SonarRangeTable, EdgeRangeTable) по источникам;
+    # все сбрасываются при изменении препятствий
+    def __init__(self, engine, table=SonarRangeTable):
+        self.engine = engine
+        self.table = table
+        self.tables = {}
+
+    def get(self, origin, version):
+        table = self.tables.get(origin)
+        if table is None or table.version != version:
+            table = self.table(origin, self.engine, version)
+            self.tables[origin] = table
+        return table
+
+    def retain(self, origins):
+        # Таблицы источников, от которых не осталось импульсов, больше не нужны
+        for origin in list(self.tables):
+            if origin not in origins:
+                del self.tables[origin]
+
+    def clear(self):
+        self.tables.clear()
+
+
+class RadarTargetTable:
+    # Центры препятствий в пределах дальности радара в полярных координатах (пеленг, дальность),
+    # отсортированные по пеленгу в [0, 2pi). Сектор луча - один или два отрезка таблицы.
+    def __init__(self, origin, centroids, range_radius, version):
+        self.origin = origin
+        self.version = version
+        centers = np.array(centroids, dtype=np.float64).reshape(-1, 2)
+        dx = centers[:, 0] - origin[0]
+        dy = centers[:, 1] - origin[1]
+        distance = np.sqrt(dx * dx + dy * dy)
+        bearing = np.arctan2(dy, dx)
+        bearing[bearing < 0] += 2 * math.pi
+        in_range = np.flatnonzero(distance <= range_radius)
+        order = in_range[np.argsort(bearing[in_range], kind="stable")]
+        self.bearing = bearing[order].tolist()
+        self.distance = distance[order].tolist()
+        self.obstacle_id = order.tolist()
+        self.centroid = [tuple(c) for c in centers[order].tolist()]
+
+    def __len__(self):
+        return len(self.bearing)
+
+    def sector_rows(self, low, high):
+        # Строки с пеленгом в [low, high] с учётом перехода через 0 / 2pi
+        full = 2 * math.pi
+        if high - low >= full:
+            return range(len(self.bearing))
+        low %= full
+        high %= full
+        bearing = self.bearing
+        if low <= high:
+            return range(bisect_left(bearing, low), bisect_right(bearing, high))
+        return list(range(bisect_left(bearing, low), len(bearing))) + list(range(0, bisect_right(bearing, high)))
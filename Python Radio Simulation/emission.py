@@ -0,0 +1,103 @@
+import numpy as np
+
+from wave_pool import ENERGY_CUTOFF, KIND_RADIO
+
+# Что делать с новой вторичной волной, когда живых вторичных волн уже max_secondary
+SECONDARY_POLICIES = ("drop_new", "drop_oldest", "merge")
+
+
+class SecondaryEmitter:
+    # Порождение отражённых и прошедших волн по событиям касания.
+    # Каждое касание (первичная волна, препятствие, ребро) порождает вторичные волны ровно один раз;
+    # общее число живых вторичных волн ограничено max_secondary, волны слабее порога своего типа не порождаются.
+    def __init__(self, pool, max_secondary=1000, policy="drop_new", merge_distance=12.0):
+        if policy not in SECONDARY_POLICIES:
+            raise ValueError(f"Неизвестная политика вторичных волн: {policy}")
+        self.pool = pool
+        self.max_secondary = max_secondary
+        self.policy = policy
+        self.merge_distance = merge_distance
+        self.contacts = {}
+        self.shadows = {}  # первичная волна -> препятствия, уже отнявшие у неё энергию
+
+        # Счётчики для статистики
+        self.emitted = 0
+        self.merged = 0
+        self.dropped = 0
+        self.culled = 0
+        self.emitted_energy = 0.0  # сумма интенсивностей порождённых и слитых волн
+
+    def first_contact(self, wave_id, obstacle_id, edge):
+        # True, если это касание встречается впервые за жизнь первичной волны
+        seen = self.contacts.setdefault(wave_id, set())
+        key = (obstacle_id, edge)
+        if key in seen:
+            return False
+        seen.add(key)
+        return True
+
+    def first_shadow(self, wave_id, obstacle_id):
+        # True, если препятствие заслоняет фронт первичной волны впервые
+        seen = self.shadows.setdefault(wave_id, set())
+        if obstacle_id in seen:
+            return False
+        seen.add(obstacle_id)
+        return True
+
+    def forget(self, wave_ids):
+        # Первичные волны ушли из пула - их касания больше не нужны
+        for wave_id in wave_ids:
+            self.contacts.pop(int(wave_id), None)
+            self.shadows.pop(int(wave_id), None)
+
+    def clear(self):
+        self.contacts.clear()
+        self.shadows.clear()
+
+    def live_secondaries(self):
+        pool = self.pool
+        n = pool.count
+        return int(np.count_nonzero(pool.active[:n] & (pool.kind[:n] != KIND_RADIO)))
+
+    def spawn(self, kind, origin, frequency, speed, intensity):
+        pool = self.pool
+        if intensity < ENERGY_CUTOFF[kind]:
+            self.culled += 1
+            return None
+        if self.policy == "merge" and self._merge(kind, origin, intensity):
+            self.merged += 1
+            self.emitted_energy += intensity
+            return None
+
+        if self.live_secondaries() >= self.max_secondary:
+            if self.policy != "drop_oldest" or not self._retire_oldest():
+                self.dropped += 1
+                return None
+            self.dropped += 1
+
+        self.emitted += 1
+        self.emitted_energy += intensity
+        return pool.spawn(kind, origin, frequency, speed, intensity)
+
+    def _merge(self, kind, origin, intensity):
+        # Сливаем с недавно рождённой волной того же типа, если центры почти совпадают
+        pool = self.pool
+        n = pool.count
+        close = (pool.active[:n] & (pool.kind[:n] == kind) & (pool.radius[:n] <= self.merge_distance)
+                 & (np.hypot(pool.origin_x[:n] - origin[0], pool.origin_y[:n] - origin[1]) <= self.merge_distance))
+        rows = np.flatnonzero(close)
+        if len(rows) == 0:
+            return False
+        row = rows[0]
+        pool.set_intensity(row, min(1.0, float(pool.intensity[row]) + intensity))
+        return True
+
+    def _retire_oldest(self):
+        # Самая старая вторичная волна стоит первой в пуле (порядок создания сохраняется)
+        pool = self.pool
+        n = pool.count
+        rows = np.flatnonzero(pool.active[:n] & (pool.kind[:n] != KIND_RADIO))
+        if len(rows) == 0:
+            return False
+        pool.active[rows[0]] = False
+        return True
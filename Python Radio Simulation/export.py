@@ -0,0 +1,231 @@
+import os
+
+# Без окна: кадры рисуются во внеэкранные поверхности
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+# Приветствие pygame в stdout испортило бы поток кадров
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+import argparse  # noqa: E402
+import queue  # noqa: E402
+import struct  # noqa: E402
+import sys  # noqa: E402
+import threading  # noqa: E402
+import time  # noqa: E402
+import zlib  # noqa: E402
+
+import numpy as np  # noqa: E402
+import pygame  # noqa: E402
+
+from renderer import Renderer  # noqa: E402
+from replay import load_session, replay  # noqa: E402
+from scene import apply_scene, load_scene  # noqa: E402
+from simulation import SIM_HEIGHT, SIM_WIDTH, TICK_RATE, SimulationWorld  # noqa: E402
+
+# Кадров в очереди на запись; если кодирование не успевает, симуляция ждёт
+EXPORT_QUEUE_SIZE = 8
+
+# Уровень zlib для PNG: 1 - быстро и крупно, 9 - медленно и мелко
+PNG_COMPRESSION = 6
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+
+def pixel_format(surface):
+    # Порядок байт пикселя в памяти в обозначениях ffmpeg -pix_fmt, например "bgr0"
+    size = surface.get_bytesize()
+    channels = {}
+    for name, mask, shift in zip("rgba", surface.get_masks(), surface.get_shifts()):
+        if mask:
+            byte = shift // 8 if sys.byteorder == "little" else size - 1 - shift // 8
+            channels[byte] = name
+    return "".join(channels.get(i, "0") for i in range(size))
+
+
+def _png_chunk(kind, data):
+    return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+
+
+def encode_png(surface, compression=PNG_COMPRESSION):
+    # PNG RGB без фильтров строк. Копирование в numpy и zlib отпускают GIL,
+    # поэтому несколько потоков-кодировщиков работают параллельно
+    width, height = surface.get_size()
+    rows = np.empty((height, width * 3 + 1), dtype=np.uint8)
+    rows[:, 0] = 0  # тип фильтра строки - None
+    target = np.lib.stride_tricks.as_strided(rows[:, 1:], shape=(height, width, 3),
+                                             strides=(rows.strides[0], 3, 1))
+    pixels = pygame.surfarray.pixels3d(surface)  # (w, h, 3) без копирования, поверхность заблокирована
+    target[...] = pixels.transpose(1, 0, 2)
+    del pixels
+    header = struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)
+    return (PNG_SIGNATURE + _png_chunk(b"IHDR", header) +
+            _png_chunk(b"IDAT", zlib.compress(rows, compression)) + _png_chunk(b"IEND", b""))
+
+
+def png_pattern(path):
+    # Шаблон имён файлов последовательности PNG или None для сырого потока
+    if path.endswith(".png"):
+        return path if "%" in path else path[:-4] + "_%06d.png"
+    if path != "-" and not os.path.splitext(path)[1]:
+        return os.path.join(path, "frame_%06d.png")
+    return None
+
+
+class FrameExporter:
+    # Кадры рисуются в поверхности из пула и уходят в ограниченную очередь, потоки-кодировщики
+    # пишут их и возвращают поверхности в пул. Пиксели не копируются между потоками,
+    # а память ограничена размером пула.
+    # Сырой поток (файл или "-" - stdout, например в ffmpeg) пишет один поток по порядку кадров,
+    # последовательность PNG - несколько потоков, каждый кадр в свой файл
+    def __init__(self, path, size, workers=None, queue_size=EXPORT_QUEUE_SIZE, compression=PNG_COMPRESSION):
+        self.path = path
+        self.size = size
+        self.compression = compression
+        self.pattern = png_pattern(path)
+        self.stream = None
+        if self.pattern is None:
+            self.stream = sys.stdout.buffer if path == "-" else open(path, "wb")
+            workers = 1
+        else:
+            directory = os.path.dirname(self.pattern)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            workers = workers or os.cpu_count() or 1
+
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.free = queue.Queue()
+        surfaces = [pygame.Surface(size) for _ in range(queue_size + workers + 1)]
+        for surface in surfaces:
+            self.free.put(surface)
+        self.pixel_format = pixel_format(surfaces[0])
+        self.frames = 0
+        self.waited = 0.0  # сколько симуляция ждала свободную поверхность, с
+        self.error = None
+        self.threads = [threading.Thread(target=self._work, daemon=True) for _ in range(workers)]
+        for thread in self.threads:
+            thread.start()
+
+    def surface(self):
+        # Свободная поверхность для следующего кадра
+        if self.error is not None:
+            raise self.error
+        started = time.perf_counter()
+        surface = self.free.get()
+        self.waited += time.perf_counter() - started
+        return surface
+
+    def submit(self, surface):
+        if self.error is not None:
+            self.free.put(surface)
+            raise self.error
+        self.queue.put((self.frames, surface))
+        self.frames += 1
+
+    def close(self):
+        for _ in self.threads:
+            self.queue.put(None)
+        for thread in self.threads:
+            thread.join()
+        if self.stream is not None and self.stream is not sys.stdout.buffer:
+            self.stream.close()
+        elif self.stream is not None:
+            self.stream.flush()
+        if self.error is not None:
+            raise self.error
+
+    def _work(self):
+        # После первой ошибки поток не завершается, а только освобождает кадры из очереди,
+        # чтобы submit() и close() не ждали вечно; ошибка поднимается в них
+        while True:
+            item = self.queue.get()
+            if item is None:
+                return
+            index, surface = item
+            try:
+                if self.error is None:
+                    if self.stream is not None:
+                        self._write_raw(surface)
+                    else:
+                        with open(self.pattern % index, "wb") as f:
+                            f.write(encode_png(surface, self.compression))
+            except Exception as error:
+                if self.error is None:
+                    self.error = error
+            finally:
+                self.free.put(surface)
+
+    def _write_raw(self, surface):
+        # Буфер пикселей поверхности пишется как есть; строки с выравниванием - по одной
+        width, height = surface.get_size()
+        row = width * surface.get_bytesize()
+        pitch = surface.get_pitch()
+        view = memoryview(surface.get_buffer())
+        if pitch == row:
+            self.stream.write(view)
+        else:
+            for y in range(height):
+                self.stream.write(view[y * pitch:y * pitch + row])
+        view.release()
+
+
+def export(source, out, fps=30, seconds=10.0, workers=None, queue_size=EXPORT_QUEUE_SIZE,
+           compression=PNG_COMPRESSION):
+    # source - запись сессии (.jsonl) или сцена (.json/.npz) с авто режимом на seconds секунд.
+    # Мир идёт фиксированными шагами, кадр снимается каждые TICK_RATE / fps тиков
+    pygame.init()
+    renderer = Renderer(SIM_WIDTH, SIM_HEIGHT, pygame.font.Font(None, 18))
+    exporter = FrameExporter(out, (SIM_WIDTH, SIM_HEIGHT), workers, queue_size, compression)
+    ticks_per_frame = max(1, round(TICK_RATE / fps))
+    ticks = [0]
+
+    def on_tick(world):
+        ticks[0] += 1
+        if ticks[0] % ticks_per_frame == 0:
+            surface = exporter.surface()
+            renderer.draw_frame(surface, world.snapshot())
+            exporter.submit(surface)
+
+    try:
+        if source.endswith(".jsonl"):
+            header, events = load_session(source)
+            replay(header, events, on_tick)
+        else:
+            world = apply_scene(SimulationWorld(), load_scene(source))
+            world.toggle_auto()
+            world.pulse("RADAR")
+            for _ in range(int(seconds * TICK_RATE)):
+                world.step()
+                on_tick(world)
+    finally:
+        exporter.close()
+    return exporter, ticks[0] / TICK_RATE
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Экспорт кадров симуляции без окна")
+    parser.add_argument("source", help="запись сессии (.jsonl) или сцена (.json/.npz)")
+    parser.add_argument("out", help="каталог или шаблон PNG (frames/f_%%06d.png), "
+                                    "иначе файл сырых кадров, '-' - в stdout")
+    parser.add_argument("--fps", type=int, default=30, help=f"кадров в секунду (делитель {TICK_RATE})")
+    parser.add_argument("--seconds", type=float, default=10.0, help="длительность для сцены, с")
+    parser.add_argument("--workers", type=int, default=None, help="потоков кодирования PNG (по умолчанию - все ядра)")
+    parser.add_argument("--queue", type=int, default=EXPORT_QUEUE_SIZE, help="кадров в очереди на запись")
+    parser.add_argument("--compression", type=int, default=PNG_COMPRESSION, help="уровень сжатия PNG 0-9")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    exporter, sim_seconds = export(args.source, args.out, args.fps, args.seconds, args.workers,
+                                   args.queue, args.compression)
+    elapsed = time.perf_counter() - started
+    # Сводка в stderr, чтобы не смешиваться с кадрами в stdout
+    print(f"{exporter.frames} кадров ({sim_seconds:.1f} с симуляции) за {elapsed:.1f} с, "
+          f"x{sim_seconds / max(elapsed, 1e-9):.1f} к реальному времени, ожидание записи {exporter.waited:.1f} с",
+          file=sys.stderr)
+    if exporter.pattern is None:
+        fps = TICK_RATE / max(1, round(TICK_RATE / args.fps))
+        print(f"ffmpeg -f rawvideo -pix_fmt {exporter.pixel_format} -s {SIM_WIDTH}x{SIM_HEIGHT} "
+              f"-r {fps:g} -i {args.out} out.mp4", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
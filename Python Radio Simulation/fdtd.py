@@ -0,0 +1,139 @@
+import math
+from collections import namedtuple
+
+import numpy as np
+import pygame
+
+# Размер ячейки сетки поля в пикселях
+FIELD_CELL = 4
+
+# Максимальное число Куранта на подшаг (устойчивость явной схемы в 2D - до 1/sqrt(2))
+COURANT = 0.5
+
+# Поглощающий слой у краёв сетки, чтобы волна не отражалась от границ окна
+SPONGE_CELLS = 12
+SPONGE_DAMPING = 0.3
+
+# Затухание за подшаг внутри материала, который гасит всю вошедшую в него энергию
+ABSORPTION_DAMPING = 0.2
+
+# Длительность импульса источника в периодах
+BURST_CYCLES = 3
+
+# Снимок поля для рендерера: значения по ячейкам [x, y] и размер ячейки
+FieldState = namedtuple("FieldState", "values cell_size")
+
+
+def material_coefficients(material):
+    # reflection, transmission и absorption - доли энергии (в сумме 1), как у лучевой модели.
+    # Скорость в материале подбирается так, чтобы при нормальном падении отражённая энергия
+    # была равна material.reflection: амплитуда r = sqrt(reflection) = (1 - n) / (1 + n).
+    # Из вошедшей в материал энергии (1 - reflection) наружу должна выйти доля transmission,
+    # остальное гасится затуханием внутри материала
+    r = math.sqrt(material.reflection)
+    speed = (1 - r) / (1 + r)
+    entered = 1 - material.reflection
+    lost = 1 - material.transmission / entered if entered > 0 else 1.0
+    return speed, min(1.0, max(0.0, lost)) * ABSORPTION_DAMPING
+
+
+class FieldSolver:
+    # Решение скалярного волнового уравнения конечными разностями по времени (FDTD).
+    # Стоимость шага фиксирована и зависит только от размера сетки, а не от числа отражений.
+    def __init__(self, width, height, cell_size=FIELD_CELL):
+        self.cell_size = cell_size
+        self.nx = int(math.ceil(width / cell_size))
+        self.ny = int(math.ceil(height / cell_size))
+        self.obstacles_version = None
+        self.sponge = self._sponge()
+        self.speed2 = np.ones((self.nx, self.ny))
+        self.damping = self.sponge.copy()
+        self.clear()
+
+    def clear(self):
+        self.u = np.zeros((self.nx, self.ny))
+        self.u_prev = np.zeros((self.nx, self.ny))
+        self.bursts = []
+        self.active = False
+
+    def _sponge(self):
+        # Затухание, плавно растущее к краям сетки
+        x = np.arange(self.nx)
+        y = np.arange(self.ny)
+        dx = np.minimum(x, self.nx - 1 - x)
+        dy = np.minimum(y, self.ny - 1 - y)
+        edge = np.minimum(dx[:, None], dy[None, :])
+        ramp = np.clip((SPONGE_CELLS - edge) / SPONGE_CELLS, 0, 1)
+        return SPONGE_DAMPING * ramp * ramp
+
+    def set_obstacles(self, obstacles, version):
+        # Растеризация препятствий в карты коэффициентов; порядок рисования как у сцены
+        if version == self.obstacles_version:
+            return
+        self.obstacles_version = version
+        mask = pygame.Surface((self.nx, self.ny))
+        mask.fill((0, 0, 0))
+        materials = []
+        for obstacle in obstacles:
+            if len(obstacle.points) < 3:
+                continue
+            if obstacle.material not in materials:
+                materials.append(obstacle.material)
+            index = materials.index(obstacle.material) + 1
+            points = [(p[0] / self.cell_size, p[1] / self.cell_size) for p in obstacle.points]
+            pygame.draw.polygon(mask, (index, 0, 0), points)
+        cells = pygame.surfarray.array_red(mask)
+
+        speed = np.ones(len(materials) + 1)
+        damping = np.zeros(len(materials) + 1)
+        for i, material in enumerate(materials, start=1):
+            speed[i], damping[i] = material_coefficients(material)
+        self.speed2 = speed[cells] ** 2
+        self.damping = damping[cells] + self.sponge
+
+    def cell_of(self, point):
+        x = min(max(int(point[0] / self.cell_size), 1), self.nx - 2)
+        y = min(max(int(point[1] / self.cell_size), 1), self.ny - 2)
+        return x, y
+
+    def add_burst(self, point, frequency, wave_speed, now):
+        # Импульс из нескольких периодов с гладкой огибающей.
+        # Длина волны та же, что шаг колец радиоволн: 50 / frequency пикселей
+        period = 50 / frequency / max(wave_speed, 1e-6)  # в тиках
+        self.bursts.append((self.cell_of(point), 2 * math.pi / period, now, BURST_CYCLES * period))
+        self.active = True
+
+    def step(self, ticks, wave_speed, now):
+        # ticks - длина шага в тиках, now - время начала шага в тиках
+        if not self.active or ticks <= 0:
+            return
+        c = wave_speed / self.cell_size  # ячеек за тик
+        substeps = max(1, int(math.ceil(c * ticks / COURANT)))
+        h = ticks / substeps
+        coefficient = self.speed2 * (c * h) ** 2
+        damping = self.damping
+        for k in range(substeps):
+            self._inject(now + k * h)
+            u = self.u
+            u_next = np.zeros_like(u)
+            lap = (u[2:, 1:-1] + u[:-2, 1:-1] + u[1:-1, 2:] + u[1:-1, :-2] - 4 * u[1:-1, 1:-1])
+            inner = (slice(1, -1), slice(1, -1))
+            u_next[inner] = ((2 * u[inner] - (1 - damping[inner]) * self.u_prev[inner]
+                              + coefficient[inner] * lap) / (1 + damping[inner]))
+            self.u_prev = u
+            self.u = u_next
+
+        # Отработавшие импульсы больше не нужны
+        self.bursts = [b for b in self.bursts if now + ticks < b[2] + b[3]]
+
+    def _inject(self, t):
+        for (x, y), omega, start, duration in self.bursts:
+            age = t - start
+            if 0 <= age <= duration:
+                envelope = math.sin(math.pi * age / duration) ** 2
+                self.u[x, y] += envelope * math.sin(omega * age)
+
+    def snapshot(self):
+        if not self.active:
+            return None
+        return FieldState(self.u.copy(), self.cell_size)
@@ -0,0 +1,99 @@
+from collections import namedtuple
+
+# Бюджет работы кадра, мс: кадр 60 Гц минус запас на flip и планировщик ОС
+FRAME_BUDGET_MS = 14.0
+
+# Качество снижается, когда сглаженное время кадра дольше DEGRADE_FRAMES кадров выше бюджета,
+# и возвращается, когда оно RESTORE_FRAMES кадров ниже RESTORE_FRACTION бюджета.
+# Возврат медленнее снижения, чтобы уровень не прыгал туда-обратно
+DEGRADE_FRAMES = 15
+RESTORE_FRAMES = 120
+RESTORE_FRACTION = 0.6
+
+# После смены уровня столько кадров без решений - пока сглаженное время не установится
+SETTLE_FRAMES = 30
+
+# Вес нового кадра в экспоненциальном сглаживании
+SMOOTHING = 0.1
+
+# Уровень детализации: рисуется каждое ring_stride-е кольцо, только front_rings колец от фронта
+# (0 - все), не рисуются волны с энергией фронта ниже min_energy, живых вторичных волн
+# не больше secondary_cap (None - как задано в мире), слой поля FDTD показывается, если show_field.
+# Отсев по энергии разгружает кадр сразу, а лимит вторичных волн - по мере ухода уже летящих
+Quality = namedtuple("Quality", "ring_stride front_rings min_energy secondary_cap show_field")
+
+QUALITY_LEVELS = (
+    Quality(1, 0, 0.0, None, True),
+    Quality(2, 0, 0.0, None, True),
+    Quality(2, 3, 0.1, None, True),
+    Quality(2, 3, 0.1, 500, True),
+    Quality(2, 2, 0.15, 250, False),
+    Quality(3, 1, 0.2, 100, False),
+)
+
+
+class QualityGovernor:
+    # Выбирает уровень детализации по измеренному времени кадра.
+    # Уровни упорядочены от полного качества к самому дешёвому; за раз меняется на один шаг
+    def __init__(self, budget_ms=FRAME_BUDGET_MS, levels=QUALITY_LEVELS):
+        self.budget_ms = budget_ms
+        self.levels = levels
+        self.level = 0
+        self.enabled = True
+        self.average = None  # сглаженное время кадра, мс
+        self.over = 0
+        self.under = 0
+        self.settle = 0
+
+        # Счётчики для статистики
+        self.degraded = 0
+        self.restored = 0
+
+    @property
+    def quality(self):
+        return self.levels[self.level]
+
+    def update(self, frame_ms):
+        # Учитывает время очередного кадра; True, если уровень изменился
+        if self.average is None:
+            self.average = frame_ms
+        else:
+            self.average += SMOOTHING * (frame_ms - self.average)
+        if not self.enabled:
+            return False
+        if self.settle > 0:
+            self.settle -= 1
+            return False
+
+        if self.average > self.budget_ms:
+            self.over += 1
+            self.under = 0
+            if self.over >= DEGRADE_FRAMES and self.level < len(self.levels) - 1:
+                self.degraded += 1
+                return self.set_level(self.level + 1)
+        elif self.average < self.budget_ms * RESTORE_FRACTION:
+            self.under += 1
+            self.over = 0
+            if self.under >= RESTORE_FRAMES and self.level > 0:
+                self.restored += 1
+                return self.set_level(self.level - 1)
+        else:
+            self.over = 0
+            self.under = 0
+        return False
+
+    def set_level(self, level):
+        level = max(0, min(len(self.levels) - 1, level))
+        changed = level != self.level
+        self.level = level
+        self.over = 0
+        self.under = 0
+        self.settle = SETTLE_FRAMES
+        return changed
+
+    def toggle(self):
+        # Выключенный регулятор возвращает полное качество
+        self.enabled = not self.enabled
+        if not self.enabled:
+            return self.set_level(0)
+        return False
@@ -0,0 +1,115 @@
+import csv
+import json
+from collections import deque
+from time import perf_counter_ns
+
+import numpy as np
+
+# Сколько последних кадров хранится для гистограмм
+DEFAULT_WINDOW = 240
+
+# Границы корзин гистограммы, мс
+HISTOGRAM_BINS = (0.0, 0.1, 0.25, 0.5, 1.0, 2.0, 4.0, 8.0, 16.0, 33.0, float("inf"))
+
+
+class FrameProfiler:
+    # Время фаз кадра по perf_counter_ns.
+    # Фаза отмечается вызовом mark(name, start) -> now, так что последовательные фазы
+    # меряются без вложенных контекстов: t = mark("a", t); ...; t = mark("b", t)
+    def __init__(self, window=DEFAULT_WINDOW):
+        self.window = window
+        self.history = {}  # фаза -> deque длительностей в нс по кадрам
+        self.totals = deque(maxlen=window)  # сумма фаз по кадрам
+        self.current = {}
+        self.counts = {}
+        self.frame = 0
+        self.export_file = None
+        self.export_writer = None
+        self.export_path = None
+
+    @staticmethod
+    def now():
+        return perf_counter_ns()
+
+    def mark(self, phase, start):
+        now = perf_counter_ns()
+        self.current[phase] = self.current.get(phase, 0) + now - start
+        return now
+
+    def end_frame(self, counts=None):
+        # Переносит замеры кадра в скользящие окна и в файл экспорта
+        for phase, ns in self.current.items():
+            history = self.history.get(phase)
+            if history is None:
+                history = self.history[phase] = deque(maxlen=self.window)
+            history.append(ns)
+        self.totals.append(sum(self.current.values()))
+        self.counts = dict(counts or {})
+        if self.export_file is not None:
+            self._export(self.current, self.counts)
+        self.current = {}
+        self.frame += 1
+
+    def phases(self):
+        return list(self.history)
+
+    def stats(self, phase):
+        # Среднее, p95 и максимум за окно, мс
+        values = np.array(self.history.get(phase, ()), dtype=np.float64) / 1e6
+        if len(values) == 0:
+            return 0.0, 0.0, 0.0
+        return float(values.mean()), float(np.percentile(values, 95)), float(values.max())
+
+    def histogram(self, phase):
+        # Число кадров окна по корзинам HISTOGRAM_BINS
+        values = np.array(self.history.get(phase, ()), dtype=np.float64) / 1e6
+        counts, _ = np.histogram(values, bins=HISTOGRAM_BINS)
+        return counts
+
+    def start_export(self, path):
+        # Формат по расширению: .csv - строки (кадр, вид, имя, значение), иначе JSONL - объект на кадр
+        self.stop_export()
+        self.export_path = path
+        self.export_file = open(path, "w", encoding="utf-8", newline="")
+        if path.endswith(".csv"):
+            self.export_writer = csv.writer(self.export_file)
+            self.export_writer.writerow(("frame", "kind", "name", "value"))
+        else:
+            self.export_writer = None
+
+    def stop_export(self):
+        if self.export_file is not None:
+            self.export_file.close()
+        self.export_file = None
+        self.export_writer = None
+
+    def _export(self, phases, counts):
+        if self.export_writer is not None:
+            for phase, ns in phases.items():
+                self.export_writer.writerow((self.frame, "phase_ms", phase, f"{ns / 1e6:.4f}"))
+            for name, value in counts.items():
+                self.export_writer.writerow((self.frame, "count", name, value))
+        else:
+            record = {
+                "frame": self.frame,
+                "phases_ms": {phase: round(ns / 1e6, 4) for phase, ns in phases.items()},
+                "counts": counts,
+            }
+            self.export_file.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+
+class NullProfiler:
+    # Заглушка без замеров: мир всегда вызывает mark(), а стоимость - один вызов метода
+    @staticmethod
+    def now():
+        return 0
+
+    @staticmethod
+    def mark(phase, start):
+        return 0
+
+    def end_frame(self, counts=None):
+        pass
+
+
+NULL_PROFILER = NullProfiler()
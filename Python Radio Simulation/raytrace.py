@@ -0,0 +1,198 @@
+import math
+from collections import namedtuple
+
+import numpy as np
+
+from collision import MAX_PAIRS_PER_CHUNK
+
+# Лучей из источника, глубина переотражений и порог энергии, ниже которого луч отбрасывается
+DEFAULT_RAYS = 360
+DEFAULT_BOUNCES = 4
+DEFAULT_CUTOFF = 0.02
+
+# Длина пути луча от источника, пикселей (вдвое больше радиуса радиоволны - под многолучёвость)
+MAX_PATH_LENGTH = 1200
+
+# Сдвиг начала нового луча от ребра, чтобы он не пересёк то же ребро повторно
+RAY_EPSILON = 1e-6
+SURFACE_OFFSET = 1e-3
+
+# Чем порождён отрезок: прямой луч из источника, отражение, прохождение
+SEGMENT_DIRECT = 0
+SEGMENT_REFLECTED = 1
+SEGMENT_TRANSMITTED = 2
+
+# Отрезки путей всех лучей одного импульса массивами: концы, расстояние по пути до начала
+# отрезка, его длина, энергия, число взаимодействий до него и тип (SEGMENT_*)
+RayPaths = namedtuple("RayPaths", "x1 y1 x2 y2 start length energy depth kind")
+
+
+def _empty_paths():
+    empty = np.zeros(0)
+    return RayPaths(empty, empty, empty, empty, empty, empty, empty,
+                    empty.astype(np.int8), empty.astype(np.int8))
+
+
+class RayTracer:
+    # Трассировка лучей от источника через отражения и прохождения по материалам препятствий.
+    # Все лучи одного поколения пересекаются со всеми рёбрами одним векторным проходом;
+    # на каждом ребре энергия делится: reflection - в отражённый луч, transmission - в прошедший,
+    # absorption теряется. Лучи слабее cutoff и глубже max_bounces не продолжаются
+    def __init__(self, engine, rays=DEFAULT_RAYS, max_bounces=DEFAULT_BOUNCES, cutoff=DEFAULT_CUTOFF,
+                 max_length=MAX_PATH_LENGTH):
+        self.engine = engine
+        self.rays = rays
+        self.max_bounces = max_bounces
+        self.cutoff = cutoff
+        self.max_length = max_length
+
+    def trace(self, origin, rays=None):
+        rays = rays or self.rays
+        angles = np.arange(rays) * (2 * math.pi / rays)
+        ox = np.full(rays, float(origin[0]))
+        oy = np.full(rays, float(origin[1]))
+        dx = np.cos(angles)
+        dy = np.sin(angles)
+        travelled = np.zeros(rays)
+        energy = np.ones(rays)
+        kind = np.full(rays, SEGMENT_DIRECT, dtype=np.int8)
+
+        engine = self.engine
+        engine.pack()
+        materials = engine.obstacles
+        reflection = np.array([o.material.reflection for o in materials], dtype=np.float64)
+        transmission = np.array([o.material.transmission for o in materials], dtype=np.float64)
+
+        parts = []
+        for depth in range(self.max_bounces + 1):
+            if len(ox) == 0:
+                break
+            remaining = self.max_length - travelled
+            t, edge = self.nearest_hits(ox, oy, dx, dy, remaining)
+            hit = t < remaining
+            length = np.where(hit, t, remaining)
+            parts.append((ox, oy, ox + dx * length, oy + dy * length, travelled, length, energy,
+                          np.full(len(ox), depth, dtype=np.int8), kind))
+            if depth == self.max_bounces or not hit.any():
+                break
+
+            # Точки попадания и нормали рёбер
+            rows = np.flatnonzero(hit)
+            edge = edge[rows]
+            hx = ox[rows] + dx[rows] * t[rows]
+            hy = oy[rows] + dy[rows] * t[rows]
+            ex = engine.edge_x2[edge] - engine.edge_x1[edge]
+            ey = engine.edge_y2[edge] - engine.edge_y1[edge]
+            edge_length = np.hypot(ex, ey)
+            nx = -ey / edge_length
+            ny = ex / edge_length
+            ray_dx = dx[rows]
+            ray_dy = dy[rows]
+            dot = ray_dx * nx + ray_dy * ny
+            obstacle = engine.edge_obstacle[edge]
+            base_energy = energy[rows]
+            base_travelled = travelled[rows] + t[rows]
+
+            reflected_energy = base_energy * reflection[obstacle]
+            transmitted_energy = base_energy * transmission[obstacle]
+            keep_reflected = reflected_energy >= self.cutoff
+            keep_transmitted = transmitted_energy >= self.cutoff
+
+            rdx = ray_dx - 2 * dot * nx
+            rdy = ray_dy - 2 * dot * ny
+            r = keep_reflected
+            s = keep_transmitted
+            ox = np.concatenate((hx[r] + rdx[r] * SURFACE_OFFSET, hx[s] + ray_dx[s] * SURFACE_OFFSET))
+            oy = np.concatenate((hy[r] + rdy[r] * SURFACE_OFFSET, hy[s] + ray_dy[s] * SURFACE_OFFSET))
+            dx = np.concatenate((rdx[r], ray_dx[s]))
+            dy = np.concatenate((rdy[r], ray_dy[s]))
+            travelled = np.concatenate((base_travelled[r], base_travelled[s]))
+            energy = np.concatenate((reflected_energy[r], transmitted_energy[s]))
+            kind = np.concatenate((np.full(int(r.sum()), SEGMENT_REFLECTED, dtype=np.int8),
+                                   np.full(int(s.sum()), SEGMENT_TRANSMITTED, dtype=np.int8)))
+
+        if not parts:
+            return _empty_paths()
+        return RayPaths(*(np.concatenate(column) for column in zip(*parts)))
+
+    def nearest_hits(self, ox, oy, dx, dy, limit):
+        # Для каждого луча - расстояние до ближайшего пересечённого ребра (inf, если нет) и номер ребра.
+        # Сначала отсев пар (луч, препятствие) по ограничивающим прямоугольникам в пределах limit,
+        # затем точное пересечение с рёбрами оставшихся препятствий
+        engine = self.engine
+        n = len(ox)
+        nearest = np.full(n, np.inf)
+        nearest_edge = np.zeros(n, dtype=np.intp)
+        if not engine.obstacles or len(engine.edge_x1) == 0:
+            return nearest, nearest_edge
+
+        # Пересечение луча с прямоугольником методом плит
+        inv_x = 1.0 / np.where(np.abs(dx) < 1e-12, 1e-12, dx)
+        inv_y = 1.0 / np.where(np.abs(dy) < 1e-12, 1e-12, dy)
+        min_x, min_y, max_x, max_y = (column[np.newaxis, :] for column in engine.bounds.T)
+        chunk = max(1, MAX_PAIRS_PER_CHUNK // len(engine.obstacles))
+        for start in range(0, n, chunk):
+            stop = min(start + chunk, n)
+            rows = slice(start, stop)
+            tx1 = (min_x - ox[rows, np.newaxis]) * inv_x[rows, np.newaxis]
+            tx2 = (max_x - ox[rows, np.newaxis]) * inv_x[rows, np.newaxis]
+            ty1 = (min_y - oy[rows, np.newaxis]) * inv_y[rows, np.newaxis]
+            ty2 = (max_y - oy[rows, np.newaxis]) * inv_y[rows, np.newaxis]
+            t_enter = np.maximum(np.minimum(tx1, tx2), np.minimum(ty1, ty2))
+            t_exit = np.minimum(np.maximum(tx1, tx2), np.maximum(ty1, ty2))
+            candidates = (t_exit >= np.maximum(t_enter, 0)) & (t_enter <= limit[rows, np.newaxis])
+            pair_rays, pair_obstacles = np.nonzero(candidates)
+            if len(pair_rays) == 0:
+                continue
+            pair_rays += start
+
+            # Рёбра всех пар подряд
+            counts = engine.edge_counts[pair_obstacles]
+            offsets = np.concatenate(([0], np.cumsum(counts)[:-1]))
+            ray = np.repeat(pair_rays, counts)
+            edge = (np.arange(int(counts.sum())) - np.repeat(offsets, counts)
+                    + np.repeat(engine.edge_starts[pair_obstacles], counts))
+
+            # Луч o + t*d и ребро p + u*e: t = (p - o) x e / (d x e), u = (p - o) x d / (d x e)
+            rx = dx[ray]
+            ry = dy[ray]
+            ex = engine.edge_x2[edge] - engine.edge_x1[edge]
+            ey = engine.edge_y2[edge] - engine.edge_y1[edge]
+            wx = engine.edge_x1[edge] - ox[ray]
+            wy = engine.edge_y1[edge] - oy[ray]
+            denom = rx * ey - ry * ex
+            parallel = np.abs(denom) < 1e-12
+            safe = np.where(parallel, 1.0, denom)
+            t = (wx * ey - wy * ex) / safe
+            u = (wx * ry - wy * rx) / safe
+            t = np.where(~parallel & (t > RAY_EPSILON) & (u >= 0) & (u <= 1), t, np.inf)
+
+            # Для каждого луча - ближайшее ребро: сортировка по (луч, t) и первое в группе луча
+            order = np.lexsort((t, ray))
+            ray_sorted = ray[order]
+            firsts = order[np.flatnonzero(np.concatenate(([True], ray_sorted[1:] != ray_sorted[:-1])))]
+            nearest[ray[firsts]] = t[firsts]
+            nearest_edge[ray[firsts]] = edge[firsts]
+        return nearest, nearest_edge
+
+
+class BeamPulse:
+    # Импульс из лучей: пути трассируются один раз при испускании (и заново при изменении препятствий),
+    # а фронт - это точки на расстоянии distance вдоль каждого пути
+    def __init__(self, origin, frequency, speed, paths, version):
+        self.origin = origin
+        self.frequency = frequency
+        self.speed = speed
+        self.distance = 0.0
+        self.active = True
+        self.set_paths(paths, version)
+
+    def set_paths(self, paths, version):
+        self.paths = paths
+        self.version = version
+        self.max_distance = float((paths.start + paths.length).max()) if len(paths.start) else 0.0
+
+    def advance(self, ticks):
+        self.distance += self.speed * ticks
+        if self.distance > self.max_distance:
+            self.active = False
@@ -0,0 +1,342 @@
+import math
+
+import numpy as np
+import pygame
+
+from culling import ARC_RADIUS, ArcCache, visible_rings
+from sprite_cache import RingSpriteCache, TextCache, build_rings
+from wave_pool import spreading
+
+
+# Усиление отображения поля: |u| * FIELD_GAIN >= 1 - полная яркость
+FIELD_GAIN = 4.0
+
+# Цвета лучей по типу отрезка (прямой, отражённый, прошедший) - как у колец тех же волн,
+# и длина штриха фронта луча, пикселей
+BEAM_COLORS = np.array(((0, 255, 255), (0, 220, 0), (200, 0, 200)), dtype=np.float64)
+BEAM_FRONT = 8
+
+
+# Цвет кольца по его радиусу при полной энергии волны: яркость падает с расхождением фронта
+def _radio_color(ring_radius):
+    alpha = int(255 * spreading(ring_radius))
+    return (0, alpha, alpha)
+
+
+def _sonar_color(ring_radius):
+    alpha = max(0, 200 - int(ring_radius * 0.8))
+    return (0, 0, min(255, alpha))
+
+
+def _reflected_color(ring_radius):
+    return (0, int(200 * spreading(ring_radius)), 0)
+
+
+def _transmitted_color(ring_radius):
+    alpha = int(150 * spreading(ring_radius))
+    return (alpha, 0, alpha)
+
+
+class Renderer:
+    # Рисует снимок SimulationWorld; состояние мира не меняет
+    def __init__(self, width, height, small_font, sprite_budget=None, text_cache=None, viewport=None):
+        self.width = width
+        self.height = height
+        # Область симуляции на экране: волны рисуются только в ней, а не под панелью управления
+        self.viewport = pygame.Rect(0, 0, width, height) if viewport is None else pygame.Rect(viewport)
+        self.view_bounds = (self.viewport.left, self.viewport.top, self.viewport.right, self.viewport.bottom)
+        # Колец пропущено в последнем кадре как невидимых
+        self.culled_rings = 0
+        self.small_font = small_font
+        self.text_cache = TextCache() if text_cache is None else text_cache
+
+        # Оверлей профилировщика и (профилировщик, кадр), на котором он собран
+        self.profile_overlay = None
+        self.profile_frame = None
+
+        # Статичный слой препятствий с подписями и версия препятствий, по которой он собран
+        self.scene_layer = None
+        self.scene_version = None
+        self.ring_sprites = RingSpriteCache() if sprite_budget is None else RingSpriteCache(sprite_budget)
+        self.ring_arcs = ArcCache()
+
+        # Детализация (см. governor.Quality): каждое ring_stride-е кольцо, только front_rings
+        # колец от фронта (0 - все), порог энергии фронта, слой поля FDTD
+        self.ring_stride = 1
+        self.front_rings = 0
+        self.min_energy = 0.0
+        self.show_field = True
+
+    def set_quality(self, quality):
+        self.ring_stride = quality.ring_stride
+        self.front_rings = quality.front_rings
+        self.min_energy = quality.min_energy
+        self.show_field = quality.show_field
+
+    def draw_obstacle(self, screen, obstacle):
+        if len(obstacle.points) > 2:
+            pygame.draw.polygon(screen, obstacle.material.color, obstacle.points)
+            border_color = tuple(min(255, c + 50) for c in obstacle.material.color)
+            pygame.draw.polygon(screen, border_color, obstacle.points, 2)
+
+            center_x = sum(p[0] for p in obstacle.points) // len(obstacle.points)
+            center_y = sum(p[1] for p in obstacle.points) // len(obstacle.points)
+
+            material_text = self.text_cache.render(self.small_font, obstacle.material.name, (255, 255, 255))
+            text_rect = material_text.get_rect(center=(center_x, center_y))
+
+            bg_rect = text_rect.inflate(8, 4)
+            bg_surface = pygame.Surface((bg_rect.width, bg_rect.height))
+            bg_surface.set_alpha(180)
+            bg_surface.fill((0, 0, 0))
+            screen.blit(bg_surface, bg_rect)
+            screen.blit(material_text, text_rect)
+
+    def draw_rings(self, screen, kind, origin, radius, ring_spacing, line_width, color_of, intensity=None):
+        # Внутренние кольца - один blit готового спрайта, кольца больше ARC_RADIUS - ломаными
+        # по видимым дугам. Кольца, не задевающие область симуляции, не рисуются вовсе.
+        # При сниженной детализации кольца реже и/или только ближайшие к фронту
+        if self.min_energy and intensity is not None and intensity * spreading(radius) < self.min_energy:
+            return
+        ring_spacing *= self.ring_stride
+        ring_count = int(radius / ring_spacing)
+        if ring_count <= 0:
+            return
+        inner = max(1, ring_count - self.front_rings + 1) if self.front_rings else 1
+        first, last = visible_rings(origin, ring_spacing, ring_count, self.view_bounds, line_width)
+        first = max(first, inner)
+        self.culled_rings += ring_count - inner + 1 - max(0, last - first + 1)
+        if first > last:
+            return
+        # Ослабленная волна - тот же спрайт с прозрачностью; на чёрном фоне это умножение цвета
+        # на энергию. Приглушённые и полные спрайты раздельно: смена режима прозрачности
+        # у поверхности RLEACCEL заново её кодирует
+        dimmed = intensity is not None and intensity < 1
+
+        # Спрайт - до последнего видимого кольца, но не больше ARC_RADIUS
+        sprite_count = min(last, int(ARC_RADIUS / ring_spacing))
+        if first <= sprite_count:
+            def build():
+                ring_radii = [i * ring_spacing for i in range(inner, sprite_count + 1)]
+                return build_rings(ring_radii, [color_of(r) for r in ring_radii], line_width)
+
+            sprite, offset = self.ring_sprites.get((kind, ring_spacing, inner, sprite_count, dimmed), build)
+            if dimmed:
+                sprite.set_alpha(int(255 * intensity), pygame.RLEACCEL)
+            screen.blit(sprite, (int(origin[0]) - offset, int(origin[1]) - offset))
+
+        for i in range(max(first, sprite_count + 1), last + 1):
+            ring_radius = i * ring_spacing
+            color = color_of(ring_radius)
+            if dimmed:
+                color = tuple(int(c * intensity) for c in color)
+            for arc in self.ring_arcs.get(origin, ring_radius, self.view_bounds, line_width):
+                pygame.draw.lines(screen, color, False, arc, line_width)
+
+    def draw_radio_wave(self, screen, wave):
+        self.draw_rings(screen, "radio", wave.origin, wave.radius, 50 / wave.frequency, 2, _radio_color,
+                        wave.intensity)
+
+    def draw_sonar_pulse(self, screen, pulse):
+        # Основная волна сонара (синие концентрические круги)
+        self.draw_rings(screen, "sonar", pulse.origin, pulse.radius, 80 / pulse.frequency, 3, _sonar_color)
+
+    def draw_radar_sweep(self, screen, radar, now=0.0):
+        # Рисуем окружность дальности радара
+        pygame.draw.circle(screen, (100, 100, 0), radar.origin, radar.range_radius, 1)
+
+        # Рисуем луч радара
+        beam_end_x = radar.origin[0] + radar.range_radius * math.cos(radar.sweep_angle)
+        beam_end_y = radar.origin[1] + radar.range_radius * math.sin(radar.sweep_angle)
+
+        # Основной луч
+        pygame.draw.line(screen, (255, 255, 0), radar.origin, (beam_end_x, beam_end_y), 3)
+
+        # Конус луча
+        left_angle = radar.sweep_angle - radar.sweep_width / 2
+        right_angle = radar.sweep_angle + radar.sweep_width / 2
+
+        left_x = radar.origin[0] + radar.range_radius * math.cos(left_angle)
+        left_y = radar.origin[1] + radar.range_radius * math.sin(left_angle)
+        right_x = radar.origin[0] + radar.range_radius * math.cos(right_angle)
+        right_y = radar.origin[1] + radar.range_radius * math.sin(right_angle)
+
+        pygame.draw.line(screen, (200, 200, 0), radar.origin, (left_x, left_y), 1)
+        pygame.draw.line(screen, (200, 200, 0), radar.origin, (right_x, right_y), 1)
+
+        # Рисуем обнаруженные объекты на радаре
+        for detection in radar.detections:
+            point = detection['point']
+            # Мигающий маркер для обнаруженных объектов
+            if int(now * 4) % 2:  # Мигание 2 раза в секунду времени симуляции
+                pygame.draw.circle(screen, (255, 0, 0), (int(point[0]), int(point[1])), 8, 3)
+
+    def draw_beam(self, screen, beam):
+        # Фронт - короткий штрих перед точкой distance на каждом пути, который она сейчас проходит;
+        # яркость по энергии луча
+        paths = beam.paths
+        live = (paths.start <= beam.distance) & (paths.start + paths.length > beam.distance)
+        if not live.any():
+            return
+        length = np.maximum(paths.length[live], 1e-9)
+        x1 = paths.x1[live]
+        y1 = paths.y1[live]
+        ux = (paths.x2[live] - x1) / length
+        uy = (paths.y2[live] - y1) / length
+        head = beam.distance - paths.start[live]
+        tail = np.maximum(head - BEAM_FRONT, 0)
+        colors = BEAM_COLORS[paths.kind[live]] * np.clip(paths.energy[live], 0.15, 1)[:, np.newaxis]
+        for ax, ay, bx, by, color in zip((x1 + ux * tail).tolist(), (y1 + uy * tail).tolist(),
+                                          (x1 + ux * head).tolist(), (y1 + uy * head).tolist(),
+                                          colors.astype(np.int32).tolist()):
+            pygame.draw.line(screen, color, (ax, ay), (bx, by), 2)
+
+    def draw_reflected_wave(self, screen, wave):
+        self.draw_rings(screen, "reflected", wave.origin, wave.radius, 50 / wave.frequency, 1,
+                        _reflected_color, wave.intensity)
+
+    def draw_transmitted_wave(self, screen, wave):
+        self.draw_rings(screen, "transmitted", wave.origin, wave.radius, 50 / wave.frequency, 1,
+                        _transmitted_color, wave.intensity)
+
+    def build_scene_layer(self, obstacles):
+        # Препятствия рисуются на чёрном, как на очищенном экране; чёрный фон слоя прозрачен
+        layer = pygame.Surface((self.width, self.height))
+        if pygame.display.get_surface() is not None:
+            layer = layer.convert()
+        layer.fill((0, 0, 0))
+        for obstacle in obstacles:
+            self.draw_obstacle(layer, obstacle)
+        layer.set_colorkey((0, 0, 0), pygame.RLEACCEL)
+        return layer
+
+    def draw_scene(self, screen, snapshot):
+        # Препятствия не двигаются - слой пересобирается только при добавлении или очистке
+        if self.scene_layer is None or self.scene_version != snapshot.obstacles_version:
+            self.scene_layer = self.build_scene_layer(snapshot.obstacles)
+            self.scene_version = snapshot.obstacles_version
+        if snapshot.obstacles:
+            screen.blit(self.scene_layer, (0, 0))
+
+    def draw_field(self, screen, field):
+        # Положительное поле - бирюзовым, отрицательное - пурпурным; поверх сцены сложением цветов
+        level = np.clip(field.values * FIELD_GAIN, -1, 1)
+        positive = (np.maximum(level, 0) * 255).astype(np.uint8)
+        negative = (np.maximum(-level, 0) * 255).astype(np.uint8)
+        rgb = np.stack((negative, positive, np.maximum(positive, negative)), axis=-1)
+        surface = pygame.surfarray.make_surface(rgb)
+        size = (field.values.shape[0] * field.cell_size, field.values.shape[1] * field.cell_size)
+        screen.blit(pygame.transform.scale(surface, size), (0, 0), special_flags=pygame.BLEND_ADD)
+
+    def draw_waves(self, screen, snapshot):
+        # Всё рисование волн обрезается по области симуляции
+        clip = screen.get_clip()
+        screen.set_clip(self.viewport.clip(clip))
+        self.culled_rings = 0
+        if snapshot.field is not None and self.show_field:
+            self.draw_field(screen, snapshot.field)
+
+        for wave in snapshot.waves:
+            self.draw_radio_wave(screen, wave)
+
+        for pulse in snapshot.sonar_pulses:
+            self.draw_sonar_pulse(screen, pulse)
+
+        for radar in snapshot.radar_sweeps:
+            self.draw_radar_sweep(screen, radar, snapshot.time)
+
+        for wave in snapshot.reflected_waves:
+            self.draw_reflected_wave(screen, wave)
+
+        for wave in snapshot.transmitted_waves:
+            self.draw_transmitted_wave(screen, wave)
+
+        for beam in snapshot.beams:
+            self.draw_beam(screen, beam)
+        screen.set_clip(clip)
+
+    def draw_sources(self, screen, snapshot):
+        # Источник радиоволн (белый с красной границей)
+        pygame.draw.circle(screen, (255, 255, 255), snapshot.wave_source, 8)
+        pygame.draw.circle(screen, (255, 0, 0), snapshot.wave_source, 8, 2)
+        source_text = self.text_cache.render(self.small_font, "R", (255, 0, 0))
+        text_rect = source_text.get_rect(center=(snapshot.wave_source[0], snapshot.wave_source[1] - 20))
+        screen.blit(source_text, text_rect)
+
+        # Источник сонара (синий)
+        pygame.draw.circle(screen, (100, 100, 255), snapshot.sonar_source, 8)
+        pygame.draw.circle(screen, (0, 0, 255), snapshot.sonar_source, 8, 2)
+        sonar_text = self.text_cache.render(self.small_font, "S", (0, 0, 255))
+        text_rect = sonar_text.get_rect(center=(snapshot.sonar_source[0], snapshot.sonar_source[1] - 20))
+        screen.blit(sonar_text, text_rect)
+
+        # Источник радара (жёлтый)
+        pygame.draw.circle(screen, (255, 255, 100), snapshot.radar_source, 8)
+        pygame.draw.circle(screen, (255, 255, 0), snapshot.radar_source, 8, 2)
+        radar_text = self.text_cache.render(self.small_font, "A", (255, 255, 0))
+        text_rect = radar_text.get_rect(center=(snapshot.radar_source[0], snapshot.radar_source[1] - 20))
+        screen.blit(radar_text, text_rect)
+
+    def draw_sonar_detections(self, screen, snapshot):
+        for pulse in snapshot.sonar_pulses:
+            for detection in pulse.detections:
+                point = detection['point']
+                # Рисуем линию от сонара к обнаруженному объекту
+                pygame.draw.line(screen, (0, 255, 255), pulse.origin, point, 1)
+                # Мигающий маркер
+                if int(snapshot.time * 3) % 2:
+                    pygame.draw.circle(screen, (0, 255, 255), (int(point[0]), int(point[1])), 6, 2)
+
+    def draw_frame(self, screen, snapshot):
+        # Кадр без панели управления - для воспроизведения и экспорта
+        screen.fill((0, 0, 0))
+        self.draw_scene(screen, snapshot)
+        self.draw_waves(screen, snapshot)
+        self.draw_sources(screen, snapshot)
+        self.draw_sonar_detections(screen, snapshot)
+
+    def draw_profiler(self, screen, profiler):
+        # Текст оверлея пересобирается 4 раза в секунду, чтобы его отрисовка не мешала замерам
+        key = (id(profiler), profiler.frame // 15)
+        if self.profile_overlay is None or key != self.profile_frame:
+            self.profile_overlay = self.build_profiler_overlay(profiler)
+            self.profile_frame = key
+        screen.blit(self.profile_overlay, (10, 10))
+
+    def build_profiler_overlay(self, profiler):
+        phases = profiler.phases()
+        line_height = 15
+        overlay = pygame.Surface((330, (len(phases) + len(profiler.counts) + 3) * line_height + 10))
+        overlay.set_alpha(200)
+        overlay.fill((0, 0, 0))
+        y = 5
+        # Колонки по фиксированным x - шрифт не моноширинный
+        columns = (5, 110, 150, 190, 240)
+        for x, title in zip(columns, ("фаза", "сред", "p95", "макс", "гистограмма")):
+            overlay.blit(self.small_font.render(title, True, (255, 255, 150)), (x, y))
+        y += line_height
+        for phase in phases:
+            mean, p95, peak = profiler.stats(phase)
+            for x, value in zip(columns, (phase, f"{mean:.2f}", f"{p95:.2f}", f"{peak:.2f}")):
+                overlay.blit(self.small_font.render(value, True, (200, 200, 200)), (x, y))
+            # Гистограмма окна: столбик на корзину, высота - доля кадров
+            counts = profiler.histogram(phase)
+            total = max(1, counts.sum())
+            for i, count in enumerate(counts):
+                bar = int(12 * count / total)
+                if bar:
+                    pygame.draw.rect(overlay, (0, 200, 200), (240 + i * 8, y + 12 - bar, 6, bar))
+            y += line_height
+
+        total = np.array(profiler.totals, dtype=np.float64) / 1e6
+        if len(total):
+            text = self.small_font.render(f"кадр {total.mean():.2f} мс, p95 {np.percentile(total, 95):.2f} мс",
+                                          True, (255, 255, 255))
+            overlay.blit(text, (5, y))
+        y += line_height
+        for name, value in profiler.counts.items():
+            overlay.blit(self.small_font.render(f"{name}: {value}", True, (180, 180, 180)), (5, y))
+            y += line_height
+        if profiler.export_path and profiler.export_file is not None:
+            overlay.blit(self.small_font.render(f"запись: {profiler.export_path}", True, (255, 100, 100)), (5, y))
+        return overlay
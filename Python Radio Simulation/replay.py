@@ -0,0 +1,174 @@
+import argparse
+import json
+import os
+import time
+
+from profiler import FrameProfiler
+from scene import apply_scene, scene_from_dict, scene_from_world, scene_to_dict
+from simulation import SimulationWorld
+
+# Версия формата записи сессии
+SESSION_VERSION = 1
+
+# Параметры мира, которые меняются командой "set"
+SETTABLE = ("frequency", "wave_speed", "system_type")
+
+
+def apply_command(world, name, args):
+    # Единственная точка, через которую ввод меняет мир - и в живой сессии, и при воспроизведении
+    if name == "pulse":
+        world.pulse()
+    elif name == "clear":
+        world.clear()
+    elif name == "toggle_auto":
+        world.toggle_auto()
+    elif name == "stop":
+        world.stop()
+    elif name == "set_source":
+        world.set_source(args[0], tuple(args[1]))
+    elif name == "add_obstacle":
+        world.add_obstacle([tuple(p) for p in args[0]], args[1])
+    elif name == "set":
+        if args[0] not in SETTABLE:
+            raise ValueError(f"Неизвестный параметр: {args[0]}")
+        setattr(world, args[0], args[1])
+    elif name == "apply_scene":
+        apply_scene(world, scene_from_dict(args[0]))
+    elif name == "set_secondary_cap":
+        world.emitter.max_secondary = args[0]
+    else:
+        raise ValueError(f"Неизвестная команда: {name}")
+
+
+def world_state(world):
+    # Начальное состояние сессии: сцена и настройки, не входящие в неё
+    return {
+        "scene": scene_to_dict(scene_from_world(world)),
+        "system_type": world.system_type,
+        "auto_mode": world.auto_mode,
+        "auto_interval": world.auto_interval,
+        "auto_timer": world.auto_timer,
+        "dt": world.dt,
+        "time": world.time,
+        "tick": world.tick,
+    }
+
+
+def world_from_state(state):
+    world = SimulationWorld(dt=state["dt"])
+    apply_scene(world, scene_from_dict(state["scene"]))
+    world.system_type = state["system_type"]
+    world.auto_mode = state["auto_mode"]
+    world.auto_interval = state["auto_interval"]
+    world.auto_timer = state["auto_timer"]
+    world.time = state["time"]
+    world.tick = state["tick"]
+    return world
+
+
+class SessionRecorder:
+    # Журнал команд ввода с номером тика симуляции, на котором они применены.
+    # Мир детерминирован по тикам, поэтому журнал плюс начальное состояние воспроизводят сессию точно
+    def __init__(self, world):
+        self.world = world
+        self.start = world_state(world)
+        self.events = []
+
+    def command(self, name, *args):
+        # В журнал попадают только применённые команды: отклонённая не изменила мир
+        tick = self.world.tick
+        apply_command(self.world, name, args)
+        self.events.append((tick, name, list(args)))
+
+    def save(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            header = {"version": SESSION_VERSION, "start": self.start, "end_tick": self.world.tick}
+            f.write(json.dumps(header, ensure_ascii=False) + "\n")
+            for tick, name, args in self.events:
+                f.write(json.dumps({"tick": tick, "command": name, "args": args}, ensure_ascii=False) + "\n")
+
+
+def load_session(path):
+    with open(path, encoding="utf-8") as f:
+        header = json.loads(f.readline())
+        if header.get("version", SESSION_VERSION) > SESSION_VERSION:
+            raise ValueError(f"Неподдерживаемая версия записи: {header['version']}")
+        events = [json.loads(line) for line in f if line.strip()]
+    return header, events
+
+
+def replay(header, events, on_tick=None, profiler=None):
+    # Команды применяются перед шагом того же тика, что и в живой сессии.
+    # on_tick(world) вызывается после каждого шага (например, для отрисовки)
+    world = world_from_state(header["start"])
+    start_tick = header["start"]["tick"]
+    if profiler is not None:
+        world.profiler = profiler
+    pending = iter(events)
+    event = next(pending, None)
+    for tick in range(start_tick, header["end_tick"]):
+        while event is not None and event["tick"] <= tick:
+            apply_command(world, event["command"], event["args"])
+            event = next(pending, None)
+        world.step()
+        if on_tick is not None:
+            on_tick(world)
+        if profiler is not None:
+            profiler.end_frame()
+    return world
+
+
+def window_renderer(headless, profiler=None):
+    # Отрисовка мира после каждого тика; headless - без окна (SDL dummy)
+    if headless:
+        os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    import pygame
+    from renderer import Renderer
+
+    pygame.init()
+    screen = pygame.display.set_mode((1200, 800))
+    renderer = Renderer(1200, 800, pygame.font.Font(None, 18))
+
+    def draw(world):
+        pygame.event.pump()
+        t = profiler.now() if profiler else 0
+        renderer.draw_frame(screen, world.snapshot())
+        pygame.display.flip()
+        if profiler:
+            profiler.mark("render", t)
+    return draw
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Воспроизведение записанной сессии")
+    parser.add_argument("session", help="файл записи (JSONL)")
+    parser.add_argument("--render", action="store_true", help="рисовать кадры в окне")
+    parser.add_argument("--headless", action="store_true", help="рисовать без окна (SDL dummy)")
+    parser.add_argument("--profile", help="записать замеры фаз в CSV/JSONL")
+    args = parser.parse_args()
+
+    header, events = load_session(args.session)
+    profiler = FrameProfiler() if args.profile else None
+    if profiler is not None:
+        profiler.start_export(args.profile)
+
+    on_tick = None
+    if args.render or args.headless:
+        on_tick = window_renderer(args.headless, profiler)
+
+    started = time.perf_counter()
+    world = replay(header, events, on_tick, profiler)
+    elapsed = time.perf_counter() - started
+    ticks = header["end_tick"] - header["start"]["tick"]
+    print(f"{ticks} тиков, {len(events)} команд за {elapsed:.2f} с ({ticks / max(elapsed, 1e-9):.0f} тиков/с)")
+    print(f"Итог: радиоволн {len(world.snapshot().waves)}, вторичных волн {world.emitter.live_secondaries()}, "
+          f"импульсов сонара {len(world.sonar_pulses)}, препятствий {len(world.obstacles)}")
+    if profiler is not None:
+        profiler.stop_export()
+        for phase in profiler.phases():
+            mean, p95, peak = profiler.stats(phase)
+            print(f"{phase:<12} сред {mean:.3f} мс  p95 {p95:.3f} мс  макс {peak:.3f} мс")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+import json
+from collections import namedtuple
+
+import numpy as np
+
+from simulation import MATERIALS
+
+# Версия формата сцены
+SCENE_VERSION = 1
+
+# Сцена: вершины всех препятствий подряд (N, 2), число вершин каждого препятствия,
+# ключи материалов, три источника и настройки волн
+Scene = namedtuple("Scene", "vertices counts materials wave_source sonar_source radar_source frequency wave_speed")
+
+
+def scene_from_world(world):
+    points = [p for obstacle in world.obstacles for p in obstacle.points]
+    return Scene(
+        vertices=np.array(points, dtype=np.float64).reshape(-1, 2),
+        counts=np.array([len(o.points) for o in world.obstacles], dtype=np.int32),
+        materials=[o.material_key for o in world.obstacles],
+        wave_source=tuple(world.wave_source),
+        sonar_source=tuple(world.sonar_source),
+        radar_source=tuple(world.radar_source),
+        frequency=float(world.frequency),
+        wave_speed=world.wave_speed,
+    )
+
+
+def scene_polygons(scene):
+    # (вершины, ключ материала) по препятствиям
+    starts = np.concatenate(([0], np.cumsum(scene.counts)))
+    vertices = scene.vertices.tolist()
+    for i, material in enumerate(scene.materials):
+        yield [tuple(p) for p in vertices[starts[i]:starts[i + 1]]], material
+
+
+def validate_scene(scene, material=None):
+    # ValueError, если сцену нельзя применить к миру целиком. Проверяется до world.clear(),
+    # чтобы плохой файл не оставил мир пустым или наполовину загруженным
+    counts = scene.counts.tolist()
+    if scene.vertices.ndim != 2 or scene.vertices.shape[1] != 2 or sum(counts) != len(scene.vertices):
+        raise ValueError("Вершины сцены не сходятся с числом вершин препятствий")
+    if not np.isfinite(scene.vertices).all():
+        raise ValueError("Координаты вершин должны быть конечными числами")
+    if len(counts) != len(scene.materials):
+        raise ValueError("Число материалов не совпадает с числом препятствий")
+    for i, (count, key) in enumerate(zip(counts, scene.materials)):
+        if count < 3:
+            raise ValueError(f"Препятствие {i}: меньше трёх вершин")
+        if (material or key) not in MATERIALS:
+            raise ValueError(f"Препятствие {i}: неизвестный материал {material or key!r}")
+    for name in ("wave_source", "sonar_source", "radar_source"):
+        source = getattr(scene, name)
+        if len(source) != 2 or not all(_is_number(c) for c in source):
+            raise ValueError(f"{name}: ожидается пара чисел")
+    for name in ("frequency", "wave_speed"):
+        if not _is_number(getattr(scene, name)) or getattr(scene, name) <= 0:
+            raise ValueError(f"{name}: ожидается положительное число")
+    return scene
+
+
+def apply_scene(world, scene, material=None):
+    # Заменяет препятствия и настройки мира; material - один материал для всех препятствий
+    validate_scene(scene, material)
+    world.clear()
+    world.set_source("RADIO", tuple(scene.wave_source))
+    world.set_source("SONAR", tuple(scene.sonar_source))
+    world.radar_source = tuple(scene.radar_source)
+    world.frequency = scene.frequency
+    world.wave_speed = scene.wave_speed
+    world.add_obstacles((points, material or key) for points, key in scene_polygons(scene))
+    return world
+
+
+def save_scene(path, scene):
+    # .npz - упакованные массивы вершин, иначе JSON
+    if path.endswith(".npz"):
+        keys = sorted(set(scene.materials))
+        codes = np.array([keys.index(m) for m in scene.materials], dtype=np.int16)
+        np.savez(path,
+                 version=np.array(SCENE_VERSION),
+                 vertices=scene.vertices.astype(np.float64),
+                 counts=scene.counts.astype(np.int32),
+                 material_keys=np.array(keys, dtype=str),
+                 material_codes=codes,
+                 sources=np.array((scene.wave_source, scene.sonar_source, scene.radar_source), dtype=np.float64),
+                 settings=np.array((scene.frequency, scene.wave_speed), dtype=np.float64))
+        return
+
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(scene_to_dict(scene), f, ensure_ascii=False)
+
+
+def load_scene(path):
+    if path.endswith(".npz"):
+        with np.load(path) as data:
+            _check_version(data["version"].item())
+            keys = data["material_keys"].tolist()
+            sources = [tuple(_coordinate(c) for c in source) for source in data["sources"].tolist()]
+            frequency, wave_speed = data["settings"].tolist()
+            return validate_scene(Scene(
+                vertices=data["vertices"].astype(np.float64),
+                counts=data["counts"].astype(np.int32),
+                materials=[keys[code] for code in data["material_codes"].tolist()],
+                wave_source=sources[0],
+                sonar_source=sources[1],
+                radar_source=sources[2],
+                frequency=frequency,
+                wave_speed=_coordinate(wave_speed),
+            ))
+
+    with open(path, encoding="utf-8") as f:
+        return validate_scene(scene_from_dict(json.load(f)))
+
+
+def scene_to_dict(scene):
+    # JSON-представление сцены
+    starts = np.concatenate(([0], np.cumsum(scene.counts)))
+    vertices = [[_coordinate(x), _coordinate(y)] for x, y in scene.vertices.tolist()]
+    return {
+        "version": SCENE_VERSION,
+        "obstacles": [{"points": vertices[starts[i]:starts[i + 1]], "material": material}
+                      for i, material in enumerate(scene.materials)],
+        "wave_source": list(scene.wave_source),
+        "sonar_source": list(scene.sonar_source),
+        "radar_source": list(scene.radar_source),
+        "frequency": scene.frequency,
+        "wave_speed": scene.wave_speed,
+    }
+
+
+def scene_from_dict(data):
+    if not isinstance(data, dict):
+        raise ValueError("Сцена должна быть объектом JSON")
+    _check_version(data.get("version", SCENE_VERSION))
+    obstacles = data.get("obstacles", ())
+    try:
+        points = [p for obstacle in obstacles for p in obstacle["points"]]
+        vertices = np.array(points, dtype=np.float64).reshape(-1, 2)
+    except (KeyError, TypeError, ValueError) as error:
+        raise ValueError(f"Неверные вершины препятствий: {error}") from error
+    return Scene(
+        vertices=vertices,
+        counts=np.array([len(o["points"]) for o in obstacles], dtype=np.int32),
+        materials=[o.get("material", "BRICK") for o in obstacles],
+        wave_source=tuple(data.get("wave_source", (300, 400))),
+        sonar_source=tuple(data.get("sonar_source", (300, 200))),
+        radar_source=tuple(data.get("radar_source", (300, 600))),
+        frequency=data.get("frequency", 1.0),
+        wave_speed=data.get("wave_speed", 2),
+    )
+
+
+def _check_version(version):
+    if isinstance(version, bool) or not isinstance(version, int):
+        raise ValueError(f"Версия сцены должна быть целым числом: {version!r}")
+    if version > SCENE_VERSION:
+        raise ValueError(f"Неподдерживаемая версия сцены: {version}")
+    return version
+
+
+def _is_number(value):
+    return isinstance(value, (int, float, np.integer, np.floating)) and not isinstance(value, bool)
+
+
+def _coordinate(value):
+    # Целые координаты и скорость остаются целыми, как у щелчков мышью и ползунка
+    return int(value) if float(value).is_integer() else value
@@ -0,0 +1,94 @@
+import heapq
+import itertools
+from collections import namedtuple
+
+from detection_tables import EdgeRangeTable, RangeTables
+
+# Типы событий
+EVENT_WAVE_CONTACT = 0  # фронт радиоволны дошёл до ребра препятствия
+
+ContactEvent = namedtuple("ContactEvent", "time kind key obstacle_id element x y distance")
+
+
+class ContactScheduler:
+    # Расписание касаний по времени пролёта.
+    # Фронт волны расширяется с постоянной скоростью из неподвижного центра, поэтому момент
+    # касания каждого ребра известен уже при рождении волны: рёбра встречаются в порядке
+    # таблицы дальностей источника (EdgeRangeTable).
+    # В куче по времени симуляции лежит только ближайшее касание каждой волны; когда оно наступает,
+    # его место занимает следующая строка таблицы. Рождение волны стоит одного бинарного поиска,
+    # а шаг мира платит только за наступившие касания.
+    def __init__(self, engine, tick_rate):
+        self.engine = engine
+        self.tick_rate = tick_rate
+        self.tables = RangeTables(engine, EdgeRangeTable)
+        self.version = 0  # меняется с каждым новым препятствием
+        self.clear()
+
+    def clear(self):
+        self.events = []
+        self.seq = itertools.count()
+        self.waves = {}
+        self.tables.clear()
+
+    def __len__(self):
+        # Сколько потоков касаний ждёт в куче (по одному на волну и добавленное в полёте препятствие)
+        return len(self.events)
+
+    def add_wave(self, wave_id, origin, speed, max_radius, spawn_time):
+        # speed - пикселей за тик, как у волн в пуле
+        self.waves[wave_id] = (origin, speed * self.tick_rate, max_radius, spawn_time)
+        self._start(wave_id, self.tables.get(origin, self.version), spawn_time, 0.0)
+
+    def on_obstacle_added(self, obstacle_id, now):
+        # Новое препятствие досчитываем для уже летящих волн - своей маленькой таблицей на источник
+        self.version += 1
+        tables = {}
+        for wave_id, (origin, rate, _, spawn_time) in self.waves.items():
+            table = tables.get(origin)
+            if table is None:
+                table = tables[origin] = EdgeRangeTable(origin, self.engine, self.version, obstacle_id)
+            self._start(wave_id, table, now, (now - spawn_time) * rate)
+
+    def forget_waves(self, wave_ids):
+        # Касания ушедших волн не удаляются из кучи, а пропускаются при извлечении
+        if len(wave_ids) == 0:
+            return
+        for wave_id in wave_ids:
+            self.waves.pop(int(wave_id), None)
+        self.tables.retain({wave[0] for wave in self.waves.values()})
+
+    def _start(self, wave_id, table, start_time, current_radius):
+        # Рёбра дальше дальности волны не задеваются; строки до start_time наступают сразу
+        if self.waves[wave_id][1] <= 0:
+            return
+        stop = table.reach_rows(self.waves[wave_id][2])
+        self._push(wave_id, table, 0, stop, start_time, current_radius)
+
+    def _push(self, wave_id, table, row, stop, start_time, current_radius):
+        # Ставит в кучу ближайшее касание потока, начиная со строки row.
+        # Ребро целиком внутри уже пройденного к start_time круга не задевается
+        far = table.far
+        while row < stop and far[row] < current_radius:
+            row += 1
+        if row == stop:
+            return
+        _, rate, _, spawn_time = self.waves[wave_id]
+        time = max(spawn_time + table.distance[row] / rate, start_time)
+        heapq.heappush(self.events, (time, next(self.seq), wave_id, table, row, stop, start_time, current_radius))
+
+    def pop_due(self, now):
+        # Все события со временем не позже now для ещё живых волн
+        due = []
+        events = self.events
+        while events and events[0][0] <= now + 1e-9:
+            time, _, wave_id, table, row, stop, start_time, current_radius = heapq.heappop(events)
+            if wave_id not in self.waves:
+                continue
+            due.append(ContactEvent(time, EVENT_WAVE_CONTACT, wave_id, table.obstacle_id[row], table.edge[row],
+                                    table.x[row], table.y[row], table.distance[row]))
+            self._push(wave_id, table, row + 1, stop, start_time, current_radius)
+        return due
+
+    def wave_origin(self, wave_id):
+        return self.waves[wave_id][0]
@@ -0,0 +1,137 @@
+import queue
+import threading
+import time
+
+from profiler import FrameProfiler
+
+# Дольше этого поток симуляции не ждёт без дела (на паузе); новая команда будит его сразу
+MAX_IDLE_SECONDS = 0.1
+
+
+class SnapshotBuffer:
+    # Последний опубликованный снимок мира - одна ссылка, которая подменяется под замком.
+    # Поток симуляции собирает снимок сам, отрисовка берёт текущую ссылку и держит снимок весь кадр.
+    # Снимки неизменяемы (копии массивов и кортежи), поэтому делить их между потоками безопасно
+    def __init__(self, snapshot=None):
+        self.lock = threading.Lock()
+        self.front = snapshot
+        self.version = 0  # число опубликованных снимков
+
+    def publish(self, snapshot):
+        with self.lock:
+            self.front = snapshot
+            self.version += 1
+
+    def latest(self):
+        with self.lock:
+            return self.front
+
+
+class SimulationThread:
+    # Мир живёт в отдельном потоке со своими часами фиксированного шага.
+    # Ввод приходит очередью: команды мира применяются через журнал сессии между шагами,
+    # поэтому запись воспроизводится так же, как при работе в одном потоке.
+    # После шагов публикуется снимок, который забирает поток отрисовки; медленный шаг
+    # задерживает только следующий снимок, а не кадр (NumPy-часть шага отпускает GIL)
+    def __init__(self, world, session, clock, report=None):
+        self.world = world
+        self.session = session
+        self.clock = clock
+        # report(error) - куда сообщить об отклонённой команде; без него ошибка останавливает поток
+        self.report = report
+        self.inbox = queue.Queue()
+        self.snapshots = SnapshotBuffer(world.snapshot())
+        # Фазы шагов меряются отдельно от фаз кадра отрисовки
+        self.profiler = FrameProfiler()
+        world.profiler = self.profiler
+        self.error = None
+        self.running = False
+        self.thread = None
+
+    def start(self):
+        self.running = True
+        self.thread = threading.Thread(target=self._run, name="simulation", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        if self.thread is None:
+            return
+        self.running = False
+        self.inbox.put(None)
+        self.thread.join()
+        self.thread = None
+        if self.error is not None:
+            raise self.error
+
+    def command(self, name, *args):
+        # Команда мира (см. replay.apply_command), записывается в журнал сессии
+        self.inbox.put((name, args))
+
+    def call(self, function, *args):
+        # Функция в потоке симуляции между шагами, без записи в журнал (часы, сохранение файлов)
+        self.inbox.put((function, args))
+
+    def latest(self):
+        # Последний опубликованный снимок; ошибка потока симуляции поднимается здесь
+        if self.error is not None:
+            raise self.error
+        return self.snapshots.latest()
+
+    def _run(self):
+        try:
+            last = time.perf_counter()
+            while self.running:
+                changed = self._drain(self._idle_seconds())
+                now = time.perf_counter()
+                steps = self.clock.advance(now - last)
+                last = now
+                for _ in range(steps):
+                    self.world.step()
+                if steps or changed:
+                    t = self.profiler.now()
+                    self.snapshots.publish(self.world.snapshot())
+                    self.profiler.mark("snapshot", t)
+                    self.profiler.end_frame({
+                        "steps": steps,
+                        "events": len(self.world.scheduler),
+                        "culled_waves": self.world.emitter.culled,
+                        "dropped_sim_s": round(self.clock.dropped, 3),
+                    })
+        except Exception as error:
+            # Поток отрисовки узнает об ошибке при следующем latest()
+            self.error = error
+
+    def _idle_seconds(self):
+        # Сколько ждать ввода до следующего шага; шаг наступает, когда накоплено полшага (см. SimulationClock)
+        clock = self.clock
+        if clock.paused:
+            return 0.0 if clock.pending_steps else MAX_IDLE_SECONDS
+        return min(MAX_IDLE_SECONDS, max(0.0, (clock.step / 2 - clock.accumulator) / clock.time_scale))
+
+    def _drain(self, timeout):
+        # Применяет всё, что пришло в очередь; первого сообщения ждёт не дольше timeout.
+        # True, если мир изменился командой
+        changed = False
+        try:
+            item = self.inbox.get(timeout=timeout) if timeout > 0 else self.inbox.get_nowait()
+            while True:
+                if item is not None:
+                    changed = self._apply(*item) or changed
+                item = self.inbox.get_nowait()
+        except queue.Empty:
+            pass
+        return changed
+
+    def _apply(self, target, args):
+        # Одна команда из очереди; ошибка отклоняет только её, поток продолжает работать
+        try:
+            if callable(target):
+                target(*args)
+                return False
+            self.session.command(target, *args)
+            return True
+        except Exception as error:
+            if self.report is None:
+                raise
+            self.report(error)
+            return False
@@ -0,0 +1,481 @@
+import math
+from collections import namedtuple
+
+import pygame
+
+from collision import CollisionEngine, angular_fraction, edge_faces
+from detection_tables import RadarTargetTable, RangeTables
+from emission import SecondaryEmitter
+from fdtd import FieldSolver
+from profiler import NULL_PROFILER
+from raytrace import BeamPulse, RayTracer
+from scheduler import ContactScheduler
+from wave_pool import KIND_RADIO, KIND_REFLECTED, KIND_TRANSMITTED, WavePool, reach, spreading
+
+# Физика считается в "тиках": скорости заданы в пикселях за тик при 60 тиках в секунду
+TICK_RATE = 60
+SIM_DT = 1.0 / TICK_RATE
+
+# Область симуляции по умолчанию (экран без панели управления)
+SIM_WIDTH, SIM_HEIGHT = 820, 800
+
+
+class SonarPulse:
+    def __init__(self, origin, frequency=0.5, speed=1.5):
+        self.origin = origin
+        self.radius = 0
+        self.prev_radius = 0
+        self.frequency = frequency
+        self.speed = speed
+        self.active = True
+        self.max_radius = 400
+        self.detections = []
+        self.detection_keys = set()  # (obstacle_id, point_index) уже обнаруженных вершин
+
+    def advance(self, dt=SIM_DT):
+        if self.active:
+            self.prev_radius = self.radius
+            self.radius += self.speed * dt * TICK_RATE
+            if self.radius > self.max_radius:
+                self.active = False
+
+    def update(self, obstacles, table, dt=SIM_DT):
+        # table - SonarRangeTable источника импульса (см. RangeTables)
+        if self.active:
+            self.advance(dt)
+
+            # Проверяем обнаружение объектов
+            self.detect_from_table(table, obstacles)
+
+    def detect_from_table(self, table, obstacles):
+        # Окно дальностей, пройденное фронтом за шаг: от прошлого радиуса до текущего, ±5.
+        # На первом шаге прошлого фронта ещё не было - окно только вокруг текущего радиуса
+        r_inner = (self.prev_radius if self.prev_radius > 0 else self.radius) - 5
+        lo, hi = table.window(r_inner, self.radius + 5)
+        for row in range(lo, hi):
+            key = (int(table.obstacle_id[row]), int(table.point_id[row]))
+            if key in self.detection_keys:
+                continue
+            obstacle = obstacles[key[0]]
+            self.add_detection(obstacle.points[key[1]], table.distance_list[row], obstacle, key,
+                               float(table.bearing[row]))
+
+    def add_detection(self, point, dist, obstacle, key, angle):
+        # key - (obstacle_id, point_index); повторное касание той же вершины не добавляет обнаружение
+        if key in self.detection_keys:
+            return
+        self.detection_keys.add(key)
+        self.detections.append({
+            'point': point,
+            'distance': dist,
+            'angle': angle,
+            'obstacle': obstacle
+        })
+
+
+class RadarSweep:
+    def __init__(self, origin, range_radius=300, sweep_speed=2):
+        self.origin = origin
+        self.range_radius = range_radius
+        self.sweep_angle = 0
+        self.sweep_speed = sweep_speed
+        self.active = True
+        self.detections = []
+        self.detected = set()  # номера препятствий, уже обнаруженных за этот оборот
+        self.sweep_width = math.pi / 6  # 30 градусов ширина луча
+        self.targets = None  # RadarTargetTable, строится по первому запросу
+        self.checked_angle = None  # угол луча на прошлой проверке в этом обороте
+
+    def target_table(self, centroids, version):
+        # Таблица целей зависит только от препятствий и позиции радара
+        if self.targets is None or self.targets.version != version:
+            self.targets = RadarTargetTable(self.origin, centroids, self.range_radius, version)
+        return self.targets
+
+    def update(self, obstacles, centroids, version, dt=SIM_DT):
+        # centroids - центры препятствий по номерам, version - версия набора препятствий
+        if self.active:
+            self.sweep_angle += self.sweep_speed * math.pi / 180 * dt * TICK_RATE  # Конвертируем в радианы
+            if self.sweep_angle >= 2 * math.pi:
+                self.sweep_angle = 0
+                self.detections.clear()  # Очищаем старые обнаружения при новом обороте
+                self.detected.clear()
+                self.checked_angle = None
+
+            # Бинарный поиск сектора, пройденного лучом с прошлой проверки, по таблице пеленгов
+            table = self.target_table(centroids, version)
+            half = self.sweep_width / 2
+            start = self.sweep_angle if self.checked_angle is None else self.checked_angle
+            self.checked_angle = self.sweep_angle
+            for row in table.sector_rows(start - half, self.sweep_angle + half):
+                self.add_detection(table.centroid[row], table.distance[row], table.bearing[row],
+                                   obstacles[table.obstacle_id[row]], table.obstacle_id[row])
+
+    def add_detection(self, point, dist, angle, obstacle, obstacle_id):
+        # Добавляем только уникальные обнаружения
+        if obstacle_id in self.detected:
+            return
+        self.detected.add(obstacle_id)
+        self.detections.append({
+            'point': point,
+            'distance': dist,
+            'angle': angle,
+            'obstacle': obstacle
+        })
+
+
+class Material:
+    def __init__(self, name, absorption, reflection, transmission, color):
+        self.name = name
+        self.absorption = absorption
+        self.reflection = reflection
+        self.transmission = transmission
+        self.color = color
+
+
+# Определяем материалы
+MATERIALS = {
+    "RAM": Material("RAM", 0.95, 0.05, 0.0, (20, 20, 20)),
+    "BRICK": Material("Кирпич", 0.7, 0.3, 0.0, (139, 69, 19)),
+    "PAPER": Material("Бумага", 0.1, 0.1, 0.8, (255, 248, 220)),
+    "GLASS": Material("Стекло", 0.05, 0.15, 0.8, (173, 216, 230)),
+    "MIRROR": Material("Зеркало", 0.02, 0.98, 0.0, (192, 192, 192)),
+    "WATER": Material("Вода", 0.3, 0.1, 0.6, (64, 164, 223)),
+    "METAL": Material("Металл", 0.1, 0.9, 0.0, (169, 169, 169))
+}
+
+
+class Obstacle:
+    def __init__(self, points, material_key="BRICK"):
+        self.points = points
+        self.rect = self.get_bounding_rect()
+        self.material_key = material_key
+        self.material = MATERIALS[material_key]
+
+    def get_bounding_rect(self):
+        if not self.points:
+            return pygame.Rect(0, 0, 0, 0)
+        min_x = min(p[0] for p in self.points)
+        max_x = max(p[0] for p in self.points)
+        min_y = min(p[1] for p in self.points)
+        max_y = max(p[1] for p in self.points)
+        return pygame.Rect(min_x, min_y, max_x - min_x, max_y - min_y)
+
+
+# Снимки состояния для отрисовки: неизменяемые копии того, что нужно рендереру
+WaveState = namedtuple("WaveState", "origin radius frequency intensity")
+
+
+class WaveArrays:
+    # Копия волн одного типа из пула; при обходе отдаёт WaveState
+    def __init__(self, pool, kind):
+        rows = pool.indices(kind)
+        self.origin_x = pool.origin_x[rows]
+        self.origin_y = pool.origin_y[rows]
+        self.radius = pool.radius[rows]
+        self.frequency = pool.frequency[rows]
+        self.intensity = pool.intensity[rows]
+
+    def __len__(self):
+        return len(self.radius)
+
+    def __iter__(self):
+        for x, y, radius, frequency, intensity in zip(self.origin_x.tolist(), self.origin_y.tolist(),
+                                                       self.radius.tolist(), self.frequency.tolist(),
+                                                       self.intensity.tolist()):
+            yield WaveState((x, y), radius, frequency, intensity)
+
+
+SonarState = namedtuple("SonarState", "origin radius frequency detections")
+RadarState = namedtuple("RadarState", "origin range_radius sweep_angle sweep_width detections")
+BeamState = namedtuple("BeamState", "origin distance frequency paths")
+WorldSnapshot = namedtuple("WorldSnapshot", [
+    "time", "tick",
+    "waves", "sonar_pulses", "radar_sweeps", "reflected_waves", "transmitted_waves", "beams",
+    "obstacles", "obstacles_version", "wave_source", "sonar_source", "radar_source",
+    "system_type", "auto_mode", "field",
+])
+
+
+class SimulationWorld:
+    """Всё состояние симуляции без окна: шаг физики, источники, препятствия.
+
+    step(dt) продвигает мир на dt секунд, run(n_steps) - на n фиксированных шагов.
+    Рендерер работает только со снимками из snapshot().
+    """
+
+    def __init__(self, wave_source=(300, 400), sonar_source=(300, 200), radar_source=(300, 600),
+                 frequency=1.0, wave_speed=2, dt=SIM_DT, max_secondary_waves=1000, secondary_policy="drop_new"):
+        self.wave_source = wave_source
+        self.sonar_source = sonar_source
+        self.radar_source = radar_source
+        self.frequency = frequency
+        self.wave_speed = wave_speed
+        self.dt = dt
+        self.time = 0.0
+        self.tick = 0
+
+        # Радиоволны, отражённые и прошедшие волны живут в одном пуле массивов
+        self.wave_pool = WavePool()
+        self.emitter = SecondaryEmitter(self.wave_pool, max_secondary_waves, secondary_policy)
+        self.sonar_pulses = []
+        self.radar_sweeps = []
+        self.obstacles = []
+        self.obstacles_version = 0
+        self.collision_engine = CollisionEngine()
+        self.centroids = []  # центры препятствий по номерам - цели радара
+        self.scheduler = ContactScheduler(self.collision_engine, TICK_RATE)
+        self.sonar_tables = RangeTables(self.collision_engine)
+
+        # Режим FIELD: волновое уравнение на сетке вместо колец
+        self.field = FieldSolver(SIM_WIDTH, SIM_HEIGHT)
+
+        # Режим RAYS: направленные лучи с переотражениями вместо колец
+        self.ray_tracer = RayTracer(self.collision_engine)
+        self.beams = []
+
+        # Замер фаз шага; FrameProfiler подставляет приложение
+        self.profiler = NULL_PROFILER
+
+        self.system_type = "RADIO"
+
+        # Автоматический режим
+        self.auto_mode = False
+        self.auto_timer = 0.0
+        self.auto_interval = 2.0  # секунды симуляции между импульсами
+
+    def pulse(self, system_type=None):
+        system_type = system_type or self.system_type
+        if system_type == "RADIO":
+            wave_id = self.wave_pool.spawn(KIND_RADIO, self.wave_source, self.frequency, self.wave_speed)
+            # Моменты касания всех рёбер известны сразу
+            self.scheduler.add_wave(wave_id, self.wave_source, self.wave_speed, reach(KIND_RADIO, 1.0), self.time)
+        elif system_type == "SONAR":
+            pulse = SonarPulse(self.sonar_source, self.frequency * 0.5, self.wave_speed * 0.8)
+            self.sonar_pulses.append(pulse)
+        elif system_type == "FIELD":
+            # Источники поля - позиции радио и сонара, сонар на половинной частоте, как SonarPulse
+            now = self.time * TICK_RATE
+            self.field.add_burst(self.wave_source, self.frequency, self.wave_speed, now)
+            self.field.add_burst(self.sonar_source, self.frequency * 0.5, self.wave_speed, now)
+        elif system_type == "RAYS":
+            paths = self.ray_tracer.trace(self.wave_source)
+            self.beams.append(BeamPulse(self.wave_source, self.frequency, self.wave_speed, paths,
+                                        self.obstacles_version))
+        elif system_type == "RADAR":
+            if not self.radar_sweeps:  # Добавляем радар только если его нет
+                self.radar_sweeps.append(RadarSweep(self.radar_source, 250, 3))
+
+    def set_source(self, system_type, position):
+        if system_type in ("RADIO", "FIELD", "RAYS"):
+            self.wave_source = position
+        elif system_type == "SONAR":
+            self.sonar_source = position
+        elif system_type == "RADAR":
+            self.radar_source = position
+            # Перезапускаем радар с новой позиции
+            self.radar_sweeps.clear()
+            self.radar_sweeps.append(RadarSweep(self.radar_source, 250, 3))
+
+    def add_obstacle(self, points, material_key="BRICK"):
+        # Неверное препятствие отклоняется до того, как мир изменится
+        points = list(points)
+        if len(points) < 3:
+            raise ValueError("Препятствию нужно не меньше трёх вершин")
+        obstacle_id = len(self.obstacles)
+        obstacle = Obstacle(points, material_key)
+        self.obstacles.append(obstacle)
+        n = len(obstacle.points)
+        self.centroids.append((sum(p[0] for p in obstacle.points) / n, sum(p[1] for p in obstacle.points) / n))
+        # Индексы обновляются инкрементально
+        self.collision_engine.add(obstacle)
+        self.scheduler.on_obstacle_added(obstacle_id, self.time)
+        self.obstacles_version += 1
+        return obstacle
+
+    def add_obstacles(self, items):
+        # items - пары (вершины, ключ материала), например из загруженной сцены
+        return [self.add_obstacle(points, material_key) for points, material_key in items]
+
+    def clear_waves(self):
+        self.wave_pool.clear()
+        self.emitter.clear()
+        self.scheduler.clear()
+        self.sonar_pulses.clear()
+        self.radar_sweeps.clear()
+        self.field.clear()
+        self.beams.clear()
+
+    def clear(self):
+        # Номера препятствий начнутся заново - старые касания недействительны
+        self.clear_waves()
+        self.obstacles.clear()
+        self.collision_engine.rebuild(self.obstacles)
+        self.centroids.clear()
+        self.sonar_tables.clear()
+        self.obstacles_version += 1
+
+    def stop(self):
+        self.auto_mode = False
+        self.clear_waves()
+
+    def toggle_auto(self):
+        self.auto_mode = not self.auto_mode
+        return self.auto_mode
+
+    def step(self, dt=None):
+        if dt is None:
+            dt = self.dt
+        profiler = self.profiler
+        t = profiler.now()
+
+        # Автоматический режим
+        if self.auto_mode:
+            self.auto_timer += dt
+            # Половина шага - запас на погрешность суммирования dt
+            if self.auto_timer + dt / 2 >= self.auto_interval:
+                self.auto_timer = 0.0
+                self.pulse()
+        t = profiler.mark("auto", t)
+
+        # Обновление всех радиоволн, отражённых и прошедших волн одним векторным шагом
+        pool = self.wave_pool
+        pool.advance(dt * TICK_RATE)
+        t = profiler.mark("waves", t)
+
+        # Касания радиоволн, наступившие к концу шага - до удаления волн, дошедших на этом шаге
+        # до своей дальности: их касания в пределах дальности ещё порождают вторичные волны
+        for event in self.scheduler.pop_due(self.time + dt):
+            self.handle_wave_contact(event)
+        retired = pool.compact()
+        self.emitter.forget(retired)
+        self.scheduler.forget_waves(retired)
+        t = profiler.mark("contacts", t)
+
+        # Обновление сонара: окно дальностей по общей таблице источника
+        for pulse in self.sonar_pulses[:]:
+            table = self.sonar_tables.get(pulse.origin, self.obstacles_version)
+            pulse.update(self.obstacles, table, dt)
+            if not pulse.active:
+                self.sonar_pulses.remove(pulse)
+        self.sonar_tables.retain({pulse.origin for pulse in self.sonar_pulses})
+        t = profiler.mark("sonar", t)
+
+        # Обновление радара
+        for radar in self.radar_sweeps[:]:
+            radar.update(self.obstacles, self.centroids, self.obstacles_version, dt)
+        t = profiler.mark("radar", t)
+
+        # Поле на сетке: карты коэффициентов пересобираются только при изменении препятствий
+        if self.field.active:
+            self.field.set_obstacles(self.obstacles, self.obstacles_version)
+            self.field.step(dt * TICK_RATE, self.wave_speed, self.time * TICK_RATE)
+        t = profiler.mark("field", t)
+
+        # Лучи: пути пересчитываются, только если препятствия изменились за время полёта
+        for beam in self.beams[:]:
+            if beam.version != self.obstacles_version:
+                beam.set_paths(self.ray_tracer.trace(beam.origin), self.obstacles_version)
+            beam.advance(dt * TICK_RATE)
+            if not beam.active:
+                self.beams.remove(beam)
+        profiler.mark("rays", t)
+
+        self.time += dt
+        self.tick += 1
+
+    def run(self, n_steps, dt=None):
+        for _ in range(n_steps):
+            self.step(dt)
+        return self
+
+    def handle_wave_contact(self, event):
+        pool = self.wave_pool
+        row = pool.row(event.key)
+        if row is None:
+            return
+        origin = self.scheduler.wave_origin(event.key)
+        collision_point = (event.x, event.y)
+        distance = math.hypot(collision_point[0] - origin[0], collision_point[1] - origin[1])
+        if distance > pool.max_radius[row]:
+            return  # волна ослабла ниже порога раньше, чем дошла до касания
+        obstacle = self.obstacles[event.obstacle_id]
+        collision = {
+            "obstacle": obstacle,
+            "obstacle_id": event.obstacle_id,
+            "point": collision_point,
+            "material": obstacle.material,
+            "edge": event.element,
+        }
+        # Каждое касание порождает вторичные волны только в первый раз,
+        # с энергией, которую фронт донёс до точки касания.
+        # Обратная сторона препятствия излучает только то, что прошло сквозь материал
+        energy = float(pool.intensity[row]) * spreading(distance)
+        if not edge_faces(obstacle, event.element, origin):
+            energy *= obstacle.material.transmission
+        if energy > 0 and self.emitter.first_contact(event.key, event.obstacle_id, event.element):
+            self.emit_secondary_waves(origin, collision, energy)
+
+        # Заслонённая препятствием часть фронта теряет поглощённое материалом (absorption)
+        # и отражённое (reflection - оно уходит отдельной вторичной волной); проходит остальное
+        if self.emitter.first_shadow(event.key, event.obstacle_id):
+            material = obstacle.material
+            shadow = angular_fraction(origin, obstacle.points)
+            lost = min(1.0, material.absorption + material.reflection)
+            pool.attenuate(row, 1 - shadow * lost)
+
+    def emit_secondary_waves(self, origin, collision, energy=1.0):
+        material = collision['material']
+
+        if material.reflection > 0.01:
+            self.emitter.spawn(
+                KIND_REFLECTED,
+                collision['point'],
+                self.frequency,
+                self.wave_speed,
+                material.reflection * energy
+            )
+
+        if material.transmission > 0.01:
+            incident_direction = (
+                collision['point'][0] - origin[0],
+                collision['point'][1] - origin[1]
+            )
+            length = math.sqrt(incident_direction[0] ** 2 + incident_direction[1] ** 2)
+            if length > 0:
+                normalized_direction = (incident_direction[0] / length, incident_direction[1] / length)
+
+                transmission_origin = (
+                    collision['point'][0] + normalized_direction[0] * 20,
+                    collision['point'][1] + normalized_direction[1] * 20
+                )
+
+                self.emitter.spawn(
+                    KIND_TRANSMITTED,
+                    transmission_origin,
+                    self.frequency,
+                    self.wave_speed,
+                    material.transmission * energy
+                )
+
+    def snapshot(self):
+        return WorldSnapshot(
+            time=self.time,
+            tick=self.tick,
+            waves=WaveArrays(self.wave_pool, KIND_RADIO),
+            sonar_pulses=tuple(SonarState(p.origin, p.radius, p.frequency, tuple(p.detections))
+                               for p in self.sonar_pulses),
+            radar_sweeps=tuple(RadarState(r.origin, r.range_radius, r.sweep_angle, r.sweep_width,
+                                          tuple(r.detections)) for r in self.radar_sweeps),
+            reflected_waves=WaveArrays(self.wave_pool, KIND_REFLECTED),
+            transmitted_waves=WaveArrays(self.wave_pool, KIND_TRANSMITTED),
+            beams=tuple(BeamState(b.origin, b.distance, b.frequency, b.paths) for b in self.beams),
+            obstacles=tuple(self.obstacles),
+            obstacles_version=self.obstacles_version,
+            wave_source=self.wave_source,
+            sonar_source=self.sonar_source,
+            radar_source=self.radar_source,
+            system_type=self.system_type,
+            auto_mode=self.auto_mode,
+            field=self.field.snapshot(),
+        )
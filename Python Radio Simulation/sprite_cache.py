@@ -0,0 +1,97 @@
+from collections import OrderedDict
+
+import pygame
+
+# Бюджет памяти кэша колец по умолчанию (байт)
+DEFAULT_BUDGET = 64 * 1024 * 1024
+
+# Цвет прозрачного фона спрайта; ни одна волна таким цветом не рисуется
+RING_COLORKEY = (255, 0, 255)
+
+
+class RingSpriteCache:
+    # Готовые изображения концентрических колец.
+    # Набор колец волны меняется, только когда фронт проходит очередной шаг колец,
+    # поэтому спрайт (тип, шаг колец, число колец, приглушён ли) общий для всех таких волн;
+    # интенсивность волны накладывается прозрачностью спрайта при выводе.
+    # Вытеснение - давно не использованные спрайты, пока не уложимся в бюджет памяти.
+    def __init__(self, budget=DEFAULT_BUDGET):
+        self.budget = budget
+        self.sprites = OrderedDict()
+        self.used = 0
+
+        # Счётчики для оверлея профилировщика и экспорта замеров
+        self.hits = 0
+        self.misses = 0
+        self.evicted = 0
+
+    def __len__(self):
+        return len(self.sprites)
+
+    def get(self, key, build):
+        # Спрайт по ключу; при промахе строится функцией build() -> (surface, offset)
+        entry = self.sprites.get(key)
+        if entry is not None:
+            self.sprites.move_to_end(key)
+            self.hits += 1
+            return entry[0], entry[1]
+
+        self.misses += 1
+        surface, offset = build()
+        size = surface.get_width() * surface.get_height() * surface.get_bytesize()
+        self.sprites[key] = (surface, offset, size)
+        self.used += size
+        # Последний добавленный спрайт не вытесняем, даже если он один больше бюджета
+        while self.used > self.budget and len(self.sprites) > 1:
+            _, (_, _, old_size) = self.sprites.popitem(last=False)
+            self.used -= old_size
+            self.evicted += 1
+        return surface, offset
+
+    def clear(self):
+        self.sprites.clear()
+        self.used = 0
+
+
+def build_rings(ring_radii, colors, line_width):
+    # Кольца с центром в середине поверхности; offset - положение центра на спрайте
+    outer = int(ring_radii[-1]) + 1 if ring_radii else 1
+    surface = pygame.Surface((2 * outer + 1, 2 * outer + 1))
+    surface.fill(RING_COLORKEY)
+    center = (outer, outer)
+    for ring_radius, color in zip(ring_radii, colors):
+        pygame.draw.circle(surface, color, center, int(ring_radius), line_width)
+    if pygame.display.get_surface() is not None:
+        surface = surface.convert()
+    surface.set_colorkey(RING_COLORKEY, pygame.RLEACCEL)
+    return surface, outer
+
+
+class TextCache:
+    # Отрисованные строки по (шрифт, текст, цвет); вытесняются давно не использованные
+    def __init__(self, max_entries=512):
+        self.max_entries = max_entries
+        self.surfaces = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.surfaces)
+
+    def render(self, font, text, color):
+        key = (font, text, color)
+        surface = self.surfaces.get(key)
+        if surface is not None:
+            self.surfaces.move_to_end(key)
+            self.hits += 1
+            return surface
+
+        self.misses += 1
+        surface = font.render(text, True, color)
+        self.surfaces[key] = surface
+        if len(self.surfaces) > self.max_entries:
+            self.surfaces.popitem(last=False)
+        return surface
+
+    def clear(self):
+        self.surfaces.clear()
@@ -0,0 +1,145 @@
+import numpy as np
+
+# Типы волн в общем пуле
+KIND_RADIO = 0
+KIND_REFLECTED = 1
+KIND_TRANSMITTED = 2
+
+# Максимальный радиус по типам волн
+MAX_RADIUS = {
+    KIND_RADIO: 600,
+    KIND_REFLECTED: 400,
+    KIND_TRANSMITTED: 400,
+}
+
+# До этого радиуса энергия фронта не падает, дальше - как 1/r (расхождение кольца на плоскости)
+SPREADING_RADIUS = 150.0
+
+# Энергия, ниже которой кольцо темнее ~10/255 и волна не порождает заметных вторичных волн
+ENERGY_CUTOFF = {
+    KIND_RADIO: 0.04,
+    KIND_REFLECTED: 0.05,
+    KIND_TRANSMITTED: 0.06,
+}
+
+
+def spreading(radius):
+    # Доля начальной энергии на радиусе radius (число или массив)
+    return SPREADING_RADIUS / np.maximum(radius, SPREADING_RADIUS)
+
+
+def reach(kind, intensity):
+    # Радиус, на котором энергия волны падает до порога её типа, но не дальше MAX_RADIUS
+    if intensity < ENERGY_CUTOFF[kind]:
+        return 0.0
+    return min(MAX_RADIUS[kind], SPREADING_RADIUS * intensity / ENERGY_CUTOFF[kind])
+
+_FIELDS = (
+    ("wave_id", np.int64),
+    ("kind", np.int8),
+    ("active", np.bool_),
+    ("origin_x", np.float64),
+    ("origin_y", np.float64),
+    ("radius", np.float64),
+    ("prev_radius", np.float64),
+    ("max_radius", np.float64),
+    ("speed", np.float64),
+    ("frequency", np.float64),
+    ("intensity", np.float64),
+)
+
+
+class WavePool:
+    # Все радиоволны, отражённые и прошедшие волны в непрерывных массивах (structure of arrays).
+    # Живые волны занимают первые count ячеек в порядке создания;
+    # отработавшие удаляются одним уплотнением за шаг.
+    # max_radius - радиус, на котором энергия падает ниже порога (см. reach), поэтому
+    # отсев слабых волн не стоит шагу ничего сверх сравнения радиусов.
+    def __init__(self, capacity=256):
+        self.capacity = capacity
+        self.count = 0
+        self.next_id = 0
+        for name, dtype in _FIELDS:
+            setattr(self, name, np.zeros(capacity, dtype=dtype))
+
+    def __len__(self):
+        return self.count
+
+    def _grow(self, needed):
+        capacity = self.capacity
+        while capacity < needed:
+            capacity *= 2
+        for name, dtype in _FIELDS:
+            array = np.zeros(capacity, dtype=dtype)
+            array[:self.count] = getattr(self, name)[:self.count]
+            setattr(self, name, array)
+        self.capacity = capacity
+
+    def spawn(self, kind, origin, frequency, speed, intensity=1.0):
+        if self.count >= self.capacity:
+            self._grow(self.count + 1)
+        i = self.count
+        self.wave_id[i] = self.next_id
+        self.kind[i] = kind
+        self.active[i] = True
+        self.origin_x[i] = origin[0]
+        self.origin_y[i] = origin[1]
+        self.radius[i] = 0.0
+        self.prev_radius[i] = 0.0
+        self.max_radius[i] = reach(kind, intensity)
+        self.speed[i] = speed
+        self.frequency[i] = frequency
+        self.intensity[i] = intensity
+        self.count += 1
+        self.next_id += 1
+        return self.wave_id[i]
+
+    def advance(self, ticks):
+        # Один векторный шаг радиусов всех волн
+        n = self.count
+        radius = self.radius[:n]
+        self.prev_radius[:n] = radius
+        radius += self.speed[:n] * ticks
+        self.active[:n] = radius <= self.max_radius[:n]
+
+    def compact(self):
+        # Уплотнение: выжившие волны сдвигаются в начало с сохранением порядка.
+        # Возвращает номера удалённых волн
+        n = self.count
+        alive = self.active[:n].copy()
+        survivors = int(np.count_nonzero(alive))
+        if survivors == n:
+            return self.wave_id[:0].copy()
+        retired = self.wave_id[:n][~alive]
+        for name, _ in _FIELDS:
+            array = getattr(self, name)
+            array[:survivors] = array[:n][alive]
+        self.count = survivors
+        return retired
+
+    def row(self, wave_id):
+        # Ячейка волны по номеру: номера растут в порядке создания, уплотнение порядок сохраняет
+        n = self.count
+        i = int(np.searchsorted(self.wave_id[:n], wave_id))
+        if i < n and self.wave_id[i] == wave_id:
+            return i
+        return None
+
+    def set_intensity(self, row, intensity):
+        # Новая энергия волны; дальность пересчитывается по ней
+        self.intensity[row] = intensity
+        self.max_radius[row] = reach(int(self.kind[row]), intensity)
+        if self.radius[row] > self.max_radius[row]:
+            self.active[row] = False
+        return intensity
+
+    def attenuate(self, row, factor):
+        # Волна теряет часть энергии
+        return self.set_intensity(row, float(self.intensity[row]) * factor)
+
+    def clear(self):
+        self.count = 0
+
+    def indices(self, kind):
+        n = self.count
+        return np.flatnonzero((self.kind[:n] == kind) & self.active[:n])